@@ -38,6 +38,36 @@ def part2_rec(modules):
     return total
 
 
+def _fuel_chunk(masses):
+    total = 0
+    fuel = masses // 3 - 2
+    while fuel.size:
+        fuel = fuel[fuel > 0]
+        total += int(fuel.sum())
+        fuel = fuel // 3 - 2
+    return total
+
+
+def part2_stream(path, chunk_size=1 << 24):
+    # Reads the masses chunk by chunk into int64 arrays so memory stays flat
+    import numpy as np
+
+    total = 0
+    rest = b''
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            chunk = rest + chunk
+            cut = chunk.rfind(b'\n') + 1
+            rest = chunk[cut:]
+            total += _fuel_chunk(np.fromstring(chunk[:cut], dtype=np.int64, sep=' '))
+    if rest.strip():
+        total += _fuel_chunk(np.array([int(rest)], dtype=np.int64))
+    return total
+
+
 masses = _read_input()
 if __name__ == '__main__':
     print(part1(masses))
@@ -84,6 +114,17 @@ def test_time_part2_rec():
     print(f'Recursive: {s/n*1000:.5f}ms')
 
 
+def test_part2_stream(tmp_path):
+    import pytest
+
+    pytest.importorskip('numpy')
+    path = tmp_path / 'masses.txt'
+    path.write_text('14\n1969\n100756')
+    assert part2_stream(path, chunk_size=4) == 2 + 966 + 50346
+    path.write_text('\n'.join(map(str, masses)) + '\n')
+    assert part2_stream(path, chunk_size=100) == 4822435
+
+
 def test_solution_part1():
     assert part1(masses) == 3216868
 
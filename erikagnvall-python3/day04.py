@@ -1,4 +1,5 @@
 import os.path
+from collections import Counter
 
 
 def _read_input():
@@ -39,16 +40,46 @@ def _increasing(n):
     return n == ''.join(sorted(n))
 
 
-def part1(start, end):
-    return len(
-        [n for n in range(start, end + 1) if _has_adjacent(n) and _increasing(n)]
+def _run_ok(run, exact):
+    return run == 2 if exact else run >= 2
+
+
+def _count_upto(n, exact):
+    # Digit DP over (previous digit, run length, pair seen, tight to n). A
+    # previous digit of -1 means only leading zeros so far. Run lengths are
+    # capped at 3 since only "exactly 2" and "at least 2" matter.
+    if n <= 0:
+        return 0
+    states = Counter({(-1, 0, False, True): 1})
+    for top in map(int, str(n)):
+        nxt = Counter()
+        for (prev, run, ok, tight), ways in states.items():
+            for d in range(max(prev, 0), (top if tight else 9) + 1):
+                t = tight and d == top
+                if prev == -1:
+                    nxt[(-1, 0, False, t) if d == 0 else (d, 1, False, t)] += ways
+                elif d == prev:
+                    nxt[(d, min(run + 1, 3), ok, t)] += ways
+                else:
+                    nxt[(d, 1, ok or _run_ok(run, exact), t)] += ways
+        states = nxt
+    return sum(
+        ways
+        for (prev, run, ok, _), ways in states.items()
+        if prev != -1 and (ok or _run_ok(run, exact))
     )
 
 
+def count_passwords(start, end, exact=False):
+    return _count_upto(end, exact) - _count_upto(start - 1, exact)
+
+
+def part1(start, end):
+    return count_passwords(start, end)
+
+
 def part2(start, end):
-    return len(
-        [n for n in range(start, end + 1) if _has_adjacent2(n) and _increasing(n)]
-    )
+    return count_passwords(start, end, exact=True)
 
 
 start, end = _read_input()
@@ -91,6 +122,22 @@ def test_increasing():
     assert _increasing(111111)
 
 
+def test_count_passwords():
+    for lo, hi in [(1, 2000), (99, 1234), (111110, 111123), (0, 0)]:
+        candidates = [n for n in range(lo, hi + 1) if _increasing(n)]
+        assert count_passwords(lo, hi) == len(
+            [n for n in candidates if _has_adjacent(n)]
+        )
+        assert count_passwords(lo, hi, exact=True) == len(
+            [n for n in candidates if _has_adjacent2(n)]
+        )
+
+
+def test_count_passwords_long_range():
+    # 18 non-decreasing digits out of 1-9 always repeat one, C(26, 8) of them
+    assert count_passwords(10 ** 17, 10 ** 18 - 1) == 1562275
+
+
 def test_solutions():
     assert part1(start, end) == 1653
     assert part2(start, end) == 1133
@@ -1,7 +1,7 @@
 import os.path
 from collections import defaultdict
 
-from graph import djikstra
+from graph import shortest_path
 
 
 def _parse_orbits(lines):
@@ -41,8 +41,8 @@ def part1(orbits):
 
 
 def part2(neighbors):
-    dist, _ = djikstra(neighbors, target='SAN', source='YOU')
-    return dist['SAN'] - 2  # subtract 2 for source and target node
+    dist, _ = shortest_path(neighbors, 'YOU', 'SAN')
+    return dist - 2  # subtract 2 for source and target node
 
 
 orbits = _read_input()
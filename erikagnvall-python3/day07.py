@@ -1,9 +1,8 @@
 import os.path
+from collections import deque
 from itertools import permutations
-from queue import Queue
-from threading import Thread
 
-from intcode import run
+from intcode import Memory, run_gen, run_until_output, schedule
 
 
 def _read_input():
@@ -11,41 +10,61 @@ def _read_input():
         return tuple(int(i) for i in f.readline().split(','))
 
 
-def _run_amp(program, inputs, outputs):
-    run(list(program), inputs=inputs, outputs=outputs)
-
-
 def _run_amps(program, seq, start=0):
     # Set up input/output queues
-    qs = [Queue() for _ in range(5)]
-    for i, s in enumerate(seq):
-        qs[i].put(s)
-    qs[0].put(0)
-
-    threads = []
-    for i in range(5):
-        threads.append(
-            Thread(target=_run_amp, args=(program, qs[i], qs[(i + 1) % len(qs)]))
-        )
-        threads[-1].start()
-
-    for t in threads:
-        t.join()
-    return qs[0].get()
+    qs = [deque([s]) for s in seq]
+    qs[0].append(0)
+
+    amps = [run_gen(list(program), qs[i]) for i in range(5)]
+    schedule(amps, qs[1:] + qs[:1])
+    return qs[0].popleft()
+
+
+def _search(program, phases, feedback=False, amps=5):
+    # Amplifier k only depends on its phase and input signal, so each stage
+    # is run once per (phase, signal) and shared between all permutations
+    # with the same prefix. The paused machines are kept for feedback mode.
+    stages = {}
+
+    def stage(phase, signal):
+        if (phase, signal) not in stages:
+            memory, ip, rel_base, out = run_until_output(
+                Memory(program), 0, [phase, signal])
+            stages[phase, signal] = ((memory, ip, rel_base), out)
+        return stages[phase, signal]
+
+    def visit(prefix, signal, states):
+        if len(prefix) == amps:
+            return _feedback(states, signal) if feedback else signal
+        best = -1
+        for p in phases:
+            if p not in prefix:
+                state, out = stage(p, signal)
+                best = max(best, visit(prefix + (p,), out, states + (state,)))
+        return best
+
+    return visit((), 0, ())
+
+
+def _feedback(states, signal):
+    # Machines are shared between prefixes, so only run copies of them
+    amps = [(memory.copy(), ip, rel_base) for memory, ip, rel_base in states]
+    while True:
+        for i, (memory, ip, rel_base) in enumerate(amps):
+            memory, ip, rel_base, out = run_until_output(
+                memory, ip, [signal], rel_base)
+            if out is None:
+                return signal
+            amps[i] = (memory, ip, rel_base)
+            signal = out
 
 
 def part1(program, phases=range(5)):
-    seqs = permutations(phases, 5)
-    max_signal = -1
-    for s in seqs:
-        signal = _run_amps(program, s)
-        if signal > max_signal:
-            max_signal = signal
-    return max_signal
+    return _search(program, phases)
 
 
 def part2(program):
-    return part1(program, phases=range(5, 10))
+    return _search(program, range(5, 10), feedback=True)
 
 
 program = _read_input()
@@ -104,6 +123,18 @@ def test_part1_examples3():
     assert part1(p) == 65210
 
 
+def test_part2_examples():
+    p = [3, 26, 1001, 26, -4, 26, 3, 27, 1002, 27, 2, 27, 1, 27, 26,
+         27, 4, 27, 1001, 28, -1, 28, 1005, 28, 6, 99, 0, 0, 5]
+    assert part2(p) == 139629729
+
+
+def test_part1_more_phases_than_amps():
+    p = [3, 15, 3, 16, 1002, 16, 10, 16, 1, 16, 15, 15, 4, 15, 99, 0, 0]
+    expected = max(_run_amps(p, s) for s in permutations(range(7), 5))
+    assert part1(p, phases=range(7)) == expected == 65432
+
+
 def test_solutions():
     assert part1(program) == 101490
     assert part2(program) == 61019896
@@ -30,23 +30,58 @@ def part1(image, w=25, h=6):
     return _count_digit(min_zeroes, digit=1) * _count_digit(min_zeroes, digit=2)
 
 
-def _get_color(layers, x, y, width):
+_DIGITS = bytes.maketrans(b'0123456789', bytes(range(10)))
+
+
+def _iter_layers(image, w, h):
+    layer_size = w * h
+    for i in range(0, len(image) - layer_size + 1, layer_size):
+        yield image[i:i + layer_size]
+
+
+def _read_layers(f, w, h):
+    layer_size = w * h
+    while True:
+        layer = f.read(layer_size)
+        if len(layer) < layer_size:
+            return
+        yield layer.translate(_DIGITS)
+
+
+def _composite(layers, w, h, checksum=False):
+    # Keeps the composite and the still transparent pixels only. Layers stop
+    # being read once nothing is transparent, unless the checksum needs all
+    # of them, in which case their digit counts are taken in the same pass
+    final_image = [2] * (w * h)
+    transparent = list(range(w * h))
+    best = None
     for layer in layers:
-        pixel = layer[y * width + x]
-        if pixel == 1:
-            return 1
-        elif pixel == 0:
-            return 0
-    return 2
+        if checksum:
+            zeroes = layer.count(0)
+            if best is None or zeroes < best[0]:
+                best = (zeroes, layer.count(1) * layer.count(2))
+        still = []
+        for i in transparent:
+            if layer[i] == 2:
+                still.append(i)
+            else:
+                final_image[i] = layer[i]
+        transparent = still
+        if not transparent and not checksum:
+            break
+    return final_image, best[1] if best else None
+
+
+def decode_file(path, w=25, h=6, checksum=False):
+    with open(path, 'rb') as f:
+        return _composite(_read_layers(f, w, h), w, h, checksum)
 
 
 def part2(image, w=25, h=6, output=True):
-    layers = _split_layers(image, w, h)
-    final_image = [3 for _ in range(w * h)]
+    final_image, _ = _composite(_iter_layers(image, w, h), w, h)
     for y in range(h):
         for x in range(w):
-            pixel = _get_color(layers, x, y, w)
-            final_image[y * w + x] = pixel
+            pixel = final_image[y * w + x]
             print('#' if pixel == 1 else ' ', end='')
         print()
     return final_image
@@ -75,6 +110,31 @@ def test_count_digits():
     assert _count_digit([1, 2, 3, 1, 0, 2, 1], 4) == 0
 
 
+def test_composite():
+    image = tuple(int(i) for i in '0222112222120000')
+    assert _composite(_iter_layers(image, 2, 2), 2, 2) == ([0, 1, 1, 0], None)
+    assert _composite(_iter_layers(image, 2, 2), 2, 2, checksum=True)[1] == 4
+
+
+def test_composite_stops_early():
+    consumed = []
+
+    def layers():
+        for layer in ((2, 1), (0, 2), (1, 1)):
+            consumed.append(layer)
+            yield layer
+
+    assert _composite(layers(), 2, 1) == ([0, 1], None)
+    assert len(consumed) == 2
+
+
+def test_decode_file():
+    final_image, checksum = decode_file(
+        os.path.basename(__file__).replace('.py', '.txt'), checksum=True)
+    assert checksum == part1(image)
+    assert final_image == part2(image)
+
+
 def test_solutions():
     assert part1(image) == 2286
 
@@ -1,8 +1,7 @@
 import os.path
-from queue import Queue
-from threading import Thread
+from collections import deque
 
-from intcode import run
+from intcode import run_gen
 
 
 def _read_input():
@@ -10,35 +9,27 @@ def _read_input():
         return [int(l) for l in f.readline().split(',')]
 
 
-def _run_robot(program, inputs, outputs):
-    run(list(program), inputs=inputs, outputs=outputs)
-
-
 def _paint(program, start=0):
-    inputs = Queue()
-    outputs = Queue()
-    t = Thread(target=_run_robot, args=(program, inputs, outputs))
-    t.start()
+    inputs = deque()
+    robot = run_gen(list(program), inputs)
     pos = (0, 0)
     whites = set()
     if start == 1:
         whites.add(pos)
     visited = set()
     direction = 0
-    while t.is_alive():
-        if pos in whites:
-            inputs.put(1)
-        else:
-            inputs.put(0)
+    for color in robot:
+        if color is None:
+            inputs.append(1 if pos in whites else 0)
+            continue
 
-        color = outputs.get()
         if color == 1:
             whites.add(pos)
         else:
             whites.discard(pos)
         visited.add(pos)
 
-        turn = outputs.get()
+        turn = next(robot)
         if turn == 0:
             direction = (direction - 1) % 4
         elif turn == 1:
@@ -1,34 +1,165 @@
-from collections import defaultdict
+from collections import defaultdict, deque
+from heapq import heappop, heappush
 
+# Graphs map each node to its neighbours. Neighbours given as a dict map to
+# edge weights, any other iterable means unit weights.
 
-def _min_dist(q, dist):
-    i = float('inf')
-    u = None
-    for v in q:
-        if dist[v] < i:
-            i = dist[v]
-            u = v
-    assert u
-    return u
 
+def _edges(graph, u):
+    neighbours = graph.get(u, ())
+    if isinstance(neighbours, dict):
+        return neighbours.items()
+    return ((v, 1) for v in neighbours)
 
-def djikstra(graph, target, source):
-    q = set(graph.keys())
-    dist = defaultdict(lambda: float('inf'))
-    prev = defaultdict(lambda: None)
 
-    dist[source] = 0
-    while q:
-        u = _min_dist(q, dist)
+def _weighted(graph):
+    return any(isinstance(n, dict) for n in graph.values())
+
 
-        q.remove(u)
+def bfs(graph, source, target=None):
+    dist = {source: 0}
+    prev = {source: None}
+    q = deque([source])
+    while q:
+        u = q.popleft()
         if u == target:
             break
+        for v in graph.get(u, ()):
+            if v not in dist:
+                dist[v] = dist[u] + 1
+                prev[v] = u
+                q.append(v)
+    return dist, prev
+
 
-        for v in graph[u]:
-            alt = dist[u] + 1
-            if alt < dist[v]:
+def dijkstra(graph, source, target=None):
+    if not _weighted(graph):
+        return bfs(graph, source, target)
+
+    dist = {source: 0}
+    prev = {source: None}
+    done = set()
+    heap = [(0, 0, source)]
+    n = 0  # tie breaker, nodes don't have to be comparable
+    while heap:
+        d, _, u = heappop(heap)
+        if u in done:
+            continue
+        done.add(u)
+        if u == target:
+            break
+        for v, w in _edges(graph, u):
+            alt = d + w
+            if alt < dist.get(v, float('inf')):
                 dist[v] = alt
                 prev[v] = u
+                n += 1
+                heappush(heap, (alt, n, v))
+    return dist, prev
+
+
+def path(prev, target):
+    if target not in prev:
+        return None
+    nodes = []
+    while target is not None:
+        nodes.append(target)
+        target = prev[target]
+    return nodes[::-1]
+
+
+# Searches from both ends at once and meets in the middle. reverse maps each
+# node to its predecessors and defaults to graph, i.e. undirected graphs.
+def shortest_path(graph, source, target, reverse=None):
+    reverse = graph if reverse is None else reverse
+    if source == target:
+        return 0, [source]
+
+    graphs = (graph, reverse)
+    dists = ({source: 0}, {target: 0})
+    prevs = ({source: None}, {target: None})
+    done = (set(), set())
+    heaps = ([(0, 0, source)], [(0, 0, target)])
+    n = 0
+    best, meet = float('inf'), None
+    while heaps[0] and heaps[1]:
+        if heaps[0][0][0] + heaps[1][0][0] >= best:
+            break
+        side = 0 if heaps[0][0][0] <= heaps[1][0][0] else 1
+        d, _, u = heappop(heaps[side])
+        if u in done[side]:
+            continue
+        done[side].add(u)
+        dist, other = dists[side], dists[1 - side]
+        for v, w in _edges(graphs[side], u):
+            alt = d + w
+            if alt < dist.get(v, float('inf')):
+                dist[v] = alt
+                prevs[side][v] = u
+                n += 1
+                heappush(heaps[side], (alt, n, v))
+            if v in other and alt + other[v] < best:
+                best, meet = alt + other[v], v
+
+    if meet is None:
+        return best, None
+    forward = path(prevs[0], meet)
+    backward = path(prevs[1], meet)
+    return best, forward + backward[-2::-1]
+
 
+# Kept for the old call sites, unit weights and (target, source) order
+def djikstra(graph, target, source):
+    found_dist, found_prev = bfs(graph, source, target)
+    dist = defaultdict(lambda: float('inf'), found_dist)
+    prev = defaultdict(lambda: None, found_prev)
     return dist, prev
+
+
+############
+# Tests
+
+# fmt: off
+grid = {
+    'a': ['b', 'c'], 'b': ['a', 'd'], 'c': ['a', 'd'],
+    'd': ['b', 'c', 'e'], 'e': ['d'], 'f': [],
+}
+weighted = {
+    'a': {'b': 1, 'c': 5}, 'b': {'a': 1, 'c': 1, 'd': 7},
+    'c': {'a': 5, 'b': 1, 'd': 2}, 'd': {'b': 7, 'c': 2},
+}
+# fmt: on
+
+
+def test_bfs():
+    dist, prev = bfs(grid, 'a')
+    assert dist['e'] == 3
+    assert 'f' not in dist
+    assert path(prev, 'e') in (['a', 'b', 'd', 'e'], ['a', 'c', 'd', 'e'])
+
+
+def test_dijkstra_weighted():
+    dist, prev = dijkstra(weighted, 'a')
+    assert dist == {'a': 0, 'b': 1, 'c': 2, 'd': 4}
+    assert path(prev, 'd') == ['a', 'b', 'c', 'd']
+
+
+def test_shortest_path():
+    assert shortest_path(weighted, 'a', 'd') == (4, ['a', 'b', 'c', 'd'])
+    assert shortest_path(weighted, 'd', 'a') == (4, ['d', 'c', 'b', 'a'])
+    assert shortest_path(grid, 'a', 'e')[0] == 3
+    assert shortest_path(grid, 'a', 'f') == (float('inf'), None)
+    assert shortest_path(grid, 'a', 'a') == (0, ['a'])
+
+
+def test_directed_shortest_path():
+    forward = {1: [2], 2: [3], 3: []}
+    reverse = {1: [], 2: [1], 3: [2]}
+    assert shortest_path(forward, 1, 3, reverse) == (2, [1, 2, 3])
+    assert shortest_path(forward, 3, 1, reverse) == (float('inf'), None)
+
+
+def test_djikstra():
+    dist, prev = djikstra(grid, target='e', source='a')
+    assert dist['e'] == 3
+    assert dist['f'] == float('inf')
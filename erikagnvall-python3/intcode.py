@@ -1,4 +1,105 @@
 import sys
+from array import array
+from collections import deque
+
+
+PAGE_BITS = 10
+PAGE_SIZE = 1 << PAGE_BITS
+PAGE_MASK = PAGE_SIZE - 1
+
+
+# Sparse pages of unboxed 64-bit cells, allocated on first write. Reads of
+# untouched addresses are 0 and values that don't fit live in the overflow map
+class Memory:
+    def __init__(self, values=()):
+        self.pages = {}
+        self.overflow = {}
+        self.size = 0
+        for i in range(0, len(values), PAGE_SIZE):
+            chunk = values[i:i + PAGE_SIZE]
+            try:
+                self.pages[i >> PAGE_BITS] = array('q', chunk)
+            except OverflowError:
+                for j, v in enumerate(chunk, i):
+                    self[j] = v
+        self.size = len(values)
+
+    def __len__(self):
+        return self.size
+
+    # Negative indices count from the end, like a list
+    def _address(self, index):
+        if index < 0:
+            if index + self.size < 0:
+                raise IndexError(f'Negative address {index}')
+            return index + self.size
+        return index
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            # Unlike a list, a slice may run past the end and reads zeros
+            start, stop, step = index.start, index.stop, index.step or 1
+            if step < 0:
+                return [self[i] for i in range(*index.indices(self.size))]
+            start = 0 if start is None else start + self.size if start < 0 else start
+            stop = self.size if stop is None else stop + self.size if stop < 0 else stop
+            return [self[i] for i in range(max(start, 0), max(stop, 0), step)]
+        index = self._address(index)
+        if self.overflow and index in self.overflow:
+            return self.overflow[index]
+        page = self.pages.get(index >> PAGE_BITS)
+        if page is None:
+            return 0
+        offset = index & PAGE_MASK
+        return page[offset] if offset < len(page) else 0
+
+    def __setitem__(self, index, value):
+        index = self._address(index)
+        page = self.pages.get(index >> PAGE_BITS)
+        if page is None:
+            page = self.pages[index >> PAGE_BITS] = array('q', bytes(8 * PAGE_SIZE))
+        offset = index & PAGE_MASK
+        if offset >= len(page):
+            page.extend(array('q', bytes(8 * (PAGE_SIZE - len(page)))))
+        try:
+            page[offset] = value
+        except OverflowError:
+            page[offset] = 0
+            self.overflow[index] = value
+        else:
+            if self.overflow:
+                self.overflow.pop(index, None)
+        if index >= self.size:
+            self.size = index + 1
+
+    def __iter__(self):
+        for i in range(self.size):
+            yield self[i]
+
+    def index(self, value):
+        return self.tolist().index(value)
+
+    def __eq__(self, other):
+        if isinstance(other, Memory):
+            other = other.tolist()
+        try:
+            other = list(other)
+        except TypeError:
+            return NotImplemented
+        return self.tolist() == other
+
+    def __repr__(self):
+        return f'Memory({self.tolist()!r})'
+
+    def copy(self):
+        copied = Memory()
+        copied.pages = {i: array('q', page) for i, page in self.pages.items()}
+        copied.overflow = dict(self.overflow)
+        copied.size = self.size
+        return copied
+
+    def tolist(self):
+        return self[0:self.size]
 
 
 def _get_modes(modes, n):
@@ -156,28 +257,75 @@ def _parse_opcode(opcode):
         raise ValueError(f"Unknown opcode {opcode}")
 
 
+def _step(memory, ip, inputs, outputs, rel_base):
+    modes = _parse_parameter_mode(memory[ip])
+    func = _parse_opcode(memory[ip])
+
+    if func == _opcode3:  # special case input
+        memory, ip = func(memory, ip, modes, inputs, rel_base)
+    elif func == _opcode4:  # special case output
+        memory, ip = func(memory, ip, modes, outputs, rel_base)
+    elif func == _opcode9:  # special case relative base change
+        rel_base, ip = func(memory, ip, modes, rel_base)
+    else:
+        memory, ip = func(memory, ip, modes, rel_base)
+    return memory, ip, rel_base
+
+
 def run(memory, ip=0, inputs=None, outputs=None, rel_base=0):
     inputs = inputs or []
     outputs = outputs or []
+    memory = Memory(memory)
     while memory[ip] != 99:
-        modes = _parse_parameter_mode(memory[ip])
-        func = _parse_opcode(memory[ip])
-
-        try:
-            if func == _opcode3:  # special case input
-                memory, ip = func(memory, ip, modes, inputs, rel_base)
-            elif func == _opcode4:  # special case output
-                memory, ip = func(memory, ip, modes, outputs, rel_base)
-            elif func == _opcode9:  # special case relative base change
-                rel_base, ip = func(memory, ip, modes, rel_base)
-            else:
-                memory, ip = func(memory, ip, modes, rel_base)
-        except IndexError:
-            memory = memory + [0] * len(memory)
+        memory, ip, rel_base = _step(memory, ip, inputs, outputs, rel_base)
 
     return memory, ip, inputs, outputs
 
 
+# Runs until the next output, which is None once the program has halted
+def run_until_output(memory, ip, inputs, rel_base=0):
+    outputs = []
+    while memory[ip] != 99 and not outputs:
+        memory, ip, rel_base = _step(memory, ip, inputs, outputs, rel_base)
+    return memory, ip, rel_base, outputs[0] if outputs else None
+
+
+# Resumable run reading from the deque inputs. Yields each output value, and
+# None whenever it is blocked waiting for input
+def run_gen(memory, inputs, ip=0, rel_base=0):
+    memory = Memory(memory)
+    out = []
+    while memory[ip] != 99:
+        if memory[ip] % 100 == 3:
+            while not inputs:
+                yield None
+            memory, ip, rel_base = _step(memory, ip, [inputs.popleft()], out, rel_base)
+        else:
+            memory, ip, rel_base = _step(memory, ip, inputs, out, rel_base)
+            if out:
+                yield out.pop()
+    return memory
+
+
+# Round-robin run_gen machines until all have halted, appending the values
+# yielded by machines[i] to the deque outputs[i]
+def schedule(machines, outputs):
+    running = list(range(len(machines)))
+    while running:
+        progress = False
+        for i in list(running):
+            for value in machines[i]:
+                if value is None:
+                    break
+                outputs[i].append(value)
+                progress = True
+            else:
+                running.remove(i)
+                progress = True
+        if not progress:
+            raise RuntimeError('All running machines are waiting for input')
+
+
 def test_parse_parameter_mode():
     assert _parse_parameter_mode(1002) == [0, 1]
     assert _parse_parameter_mode(11003) == [0, 1, 1]
@@ -227,3 +375,77 @@ def test_mod_rel_base():
     memory[1985] = 12345
     _, _, _, outputs = run(memory, rel_base=2019)
     assert outputs[0] == 12345
+
+
+def test_memory_overflow():
+    memory = Memory([1, 2, 3])
+    memory[1] = 1 << 70
+    assert memory[1] == 1 << 70
+    assert memory.tolist() == [1, 1 << 70, 3]
+
+    memory[1] = 5
+    assert memory[1] == 5
+    assert not memory.overflow
+
+
+def test_memory_sparse():
+    memory = Memory([1, 2, 3])
+    assert memory[5000000] == 0
+    memory[5000000] = 7
+    assert memory[5000000] == 7
+    assert len(memory.pages) == 2
+    assert len(memory) == 5000001
+    assert memory[3:6] == [0, 0, 0]
+
+    assert memory[4999999:] == [0, 7]
+    assert memory[-1:] == [7]
+
+    copied = memory.copy()
+    copied[1] = 1 << 70
+    assert memory[1] == 2
+    assert copied[5000000] == 7
+
+
+def test_run_memory_is_iterable():
+    import pytest
+
+    mem = run([1, 0, 0, 0, 99])[0]
+    assert list(mem) == [2, 0, 0, 0, 99]
+    assert sum(mem) == 101
+    assert mem.index(99) == 4
+    assert mem[3:] == [0, 99]
+    assert mem[::-2] == [99, 0, 2]
+    assert mem[-1] == 99 and mem[-5] == 2
+    assert mem != None and mem != 5
+    assert repr(mem) == 'Memory([2, 0, 0, 0, 99])'
+    mem[-2] = 7
+    assert mem == [2, 0, 0, 7, 99]
+    with pytest.raises(IndexError):
+        mem[-6]
+
+
+def test_run_far_relative_write():
+    memory = [109, 3000000, 21101, 2, 3, 0, 204, 0, 99]
+    mem, _, _, outputs = run(memory)
+    assert outputs == [5]
+    assert mem[:9] == memory
+
+
+def test_run_gen_blocks_for_input():
+    inputs = deque()
+    machine = run_gen([3, 9, 1001, 9, 1, 9, 4, 9, 99, 0], inputs)
+    assert next(machine) is None
+    inputs.append(41)
+    assert next(machine) == 42
+    assert list(machine) == []
+
+
+def test_schedule_deadlock():
+    qs = [deque(), deque()]
+    machines = [run_gen([3, 0, 99], qs[1]), run_gen([3, 0, 99], qs[0])]
+    try:
+        schedule(machines, qs)
+    except RuntimeError:
+        pass
+    else:
+        assert False
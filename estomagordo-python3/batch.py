@@ -0,0 +1,153 @@
+import numpy as np
+
+
+INT64_MIN = np.iinfo(np.int64).min
+
+
+class BatchComputer:
+    def __init__(self, program, count):
+        self.count = count
+        self.memory = np.tile(np.array(program, dtype=np.int64), (count, 1))
+        self.pc = np.zeros(count, dtype=np.int64)
+        self.relbase = np.zeros(count, dtype=np.int64)
+        self.halted = np.zeros(count, dtype=bool)
+        self.inputs = np.zeros((count, 0), dtype=np.int64)
+        self.inptr = np.zeros(count, dtype=np.int64)
+        self.outputs = np.zeros((count, 0), dtype=np.int64)
+        self.outcount = np.zeros(count, dtype=np.int64)
+        self.steps = 0
+
+    def ensure(self, address):
+        width = self.memory.shape[1]
+
+        if address >= width:
+            grown = max(2 * width, address + 1)
+            self.memory = np.hstack([self.memory, np.zeros((self.count, grown - width), dtype=np.int64)])
+
+    def check(self, address):
+        # Negative indices would silently wrap around to the end of the rows
+        if int(address.min()) < 0:
+            raise IndexError(f'negative address {int(address.min())}')
+
+        self.ensure(int(address.max()))
+
+    def poke(self, address, values):
+        self.ensure(address)
+        self.memory[:, address] = values
+
+    def peek(self, address):
+        self.ensure(address)
+        return self.memory[:, address]
+
+    def feed(self, values):
+        self.inputs = np.hstack([self.inputs, np.asarray(values, dtype=np.int64).reshape(self.count, 1)])
+
+    def last_outputs(self):
+        return self.outputs[np.arange(self.count), self.outcount - 1]
+
+    def param(self, group, pc, mode, offset):
+        raw = self.memory[group, pc + offset]
+
+        if mode == 1:
+            return raw
+
+        address = raw if mode == 0 else raw + self.relbase[group]
+        self.check(address)
+
+        return self.memory[group, address]
+
+    def target(self, group, pc, mode, offset):
+        raw = self.memory[group, pc + offset]
+        address = raw if mode == 0 else raw + self.relbase[group]
+        self.check(address)
+
+        return address
+
+    def execute(self, group, pc, instruction):
+        opcode = instruction % 100
+        amode = (instruction % 1000) // 100
+        bmode = (instruction % 10000) // 1000
+        cmode = (instruction % 100000) // 10000
+        self.ensure(pc + 3)
+
+        if opcode == 99:
+            self.halted[group] = True
+        elif opcode in (1, 2, 7, 8):
+            a = self.param(group, pc, amode, 1)
+            b = self.param(group, pc, bmode, 2)
+            c = self.target(group, pc, cmode, 3)
+
+            if opcode == 1:
+                value = a + b
+                # The sum wrapped if it has the opposite sign of both operands
+                wrapped = ((a ^ value) & (b ^ value)) < 0
+            elif opcode == 2:
+                value = a * b
+                # The product wrapped if dividing it back doesn't give the operand
+                divisor = np.where((b == 0) | (b == -1), 1, b)
+                wrapped = (b != 0) & np.where(b == -1, a == INT64_MIN, value // divisor != a)
+            elif opcode == 7:
+                value = (a < b).astype(np.int64)
+            else:
+                value = (a == b).astype(np.int64)
+
+            if opcode in (1, 2) and wrapped.any():
+                raise OverflowError(f'result at {pc} does not fit in int64')
+
+            self.memory[group, c] = value
+            self.pc[group] += 4
+        elif opcode == 3:
+            a = self.target(group, pc, amode, 1)
+            self.memory[group, a] = self.inputs[group, self.inptr[group]]
+            self.inptr[group] += 1
+            self.pc[group] += 2
+        elif opcode == 4:
+            a = self.param(group, pc, amode, 1)
+
+            if int(self.outcount[group].max()) >= self.outputs.shape[1]:
+                extra = np.zeros((self.count, max(1, self.outputs.shape[1])), dtype=np.int64)
+                self.outputs = np.hstack([self.outputs, extra])
+
+            self.outputs[group, self.outcount[group]] = a
+            self.outcount[group] += 1
+            self.pc[group] += 2
+        elif opcode in (5, 6):
+            a = self.param(group, pc, amode, 1)
+            b = self.param(group, pc, bmode, 2)
+            jump = a != 0 if opcode == 5 else a == 0
+            self.pc[group] = np.where(jump, b, pc + 3)
+        elif opcode == 9:
+            self.relbase[group] += self.param(group, pc, amode, 1)
+            self.pc[group] += 2
+        else:
+            print('uh oh', instruction)
+            self.halted[group] = True
+
+    def step(self):
+        live = np.flatnonzero(~self.halted)
+        pcs = self.pc[live]
+        self.ensure(int(pcs.max(initial=0)))
+        words = self.memory[live, pcs]
+        ready = (words % 100 != 3) | (self.inptr[live] < self.inputs.shape[1])
+        live, pcs, words = live[ready], pcs[ready], words[ready]
+
+        if not len(live):
+            return False
+
+        order = np.lexsort((words, pcs))
+        live, pcs, words = live[order], pcs[order], words[order]
+        bounds = np.flatnonzero((np.diff(pcs) != 0) | (np.diff(words) != 0)) + 1
+        starts = np.concatenate([[0], bounds])
+
+        for group, start in zip(np.split(live, bounds), starts):
+            self.execute(group, int(pcs[start]), int(words[start]))
+
+        self.steps += 1
+
+        return True
+
+    def run(self):
+        while self.step():
+            pass
+
+        return self.halted.all()
@@ -33,26 +33,19 @@ def solve(data, inp):
     painted[(0, 0)] = 1
     y = 0
     x = 0
-    output_count = 0    
     directions = ((-1, 0), (0, 1), (1, 0), (0, -1))
     facing = 0
-    computer = Computer(data, inp)
-    retval, retcode = 0, 0
+    computer = Computer(data, None)
+    computer.queue_input(inp)
+    retcode = 0
 
-    while True:
-        retcode, retval = computer.step()
+    while retcode != -1:
+        retcode, outputs = computer.run()
 
-        if retcode == -1:
-            break
+        for color, turn in zip(outputs[::2], outputs[1::2]):
+            painted[(y, x)] = color
 
-        if retcode == 0:
-            computer.set_input(painted[(y, x)])
-            continue
-
-        if output_count % 2 == 0:
-            painted[(y, x)] = retval
-        else:
-            if retval == 0:
+            if turn == 0:
                 facing = (facing - 1) % 4
             else:
                 facing = (facing + 1) % 4
@@ -60,9 +53,7 @@ def solve(data, inp):
             y += directions[facing][0]
             x += directions[facing][1]
 
-        computer.set_input(painted[(y, x)])
-
-        output_count += 1
+        computer.queue_input(painted[(y, x)])
 
     return paint(painted)
 
@@ -2,7 +2,7 @@ import re
 
 from heapq import heappop, heappush
 from collections import Counter, defaultdict
-from intcode import Computer
+from jit import JitComputer as Computer
 
 
 def draw(cells, lowest, highest):
@@ -25,13 +25,10 @@ def draw(cells, lowest, highest):
 
 
 def solve(d):
-    computer = Computer(d, 0, 2)
-    count = 0
+    computer = Computer(d, None, 2)
     retcode = 0
-    loops = 0
     lowest = 100
     highest = -100
-    out = [-1, -1, -1]
     score = 0
     ballx = 0
     padx = 0
@@ -39,28 +36,23 @@ def solve(d):
     cells = {}
     
     while retcode != -1:
-        retcode, retval = computer.step()
-        if retcode != 1:
-            continue
-   
-        if out[:2] == [-1, 0] and loops % 3 == 2:
-            score = retval
-        else:
-            out[loops % 3] = retval
+        retcode, outputs = computer.run()
 
-        if loops % 3 == 2:                
-            cells[(out[1], out[0])] = out[2]
-            if retval == 3:
-                padx = out[0]
-            if retval == 4:
-                ballx = out[0]
-        else:
-            lowest = min(lowest, retval)
-            highest = max(highest, retval)
+        for x, y, tile in zip(outputs[::3], outputs[1::3], outputs[2::3]):
+            if (x, y) == (-1, 0):
+                score = tile
+                continue
 
-        computer.set_input(0 if ballx == padx else -1 if ballx < padx else 1)
-        
-        loops += 1
+            cells[(y, x)] = tile
+            lowest = min(lowest, x, y)
+            highest = max(highest, x, y)
+
+            if tile == 3:
+                padx = x
+            if tile == 4:
+                ballx = x
+
+        computer.queue_input(0 if ballx == padx else -1 if ballx < padx else 1)
 
     return score
     
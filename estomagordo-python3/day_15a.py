@@ -2,7 +2,6 @@ import re
 
 from heapq import heappop, heappush
 from collections import Counter, defaultdict
-from copy import deepcopy
 from intcode import Computer
 
 
@@ -65,19 +64,19 @@ def explore(d):
         seen.add((ny, nx))
 
         if ny > ymin and (ny - 1, nx) not in walls | seen:
-            newcomp = deepcopy(computer)
+            newcomp = computer.fork()
             newcomp.set_input(1)
             frontier.append((newcomp, 1, ny, nx))
         if ny < ymax and (ny + 1, nx) not in walls | seen:
-            newcomp = deepcopy(computer)
+            newcomp = computer.fork()
             newcomp.set_input(2)
             frontier.append((newcomp, 2, ny, nx))
         if nx > xmin and (ny, nx - 1) not in walls | seen:
-            newcomp = deepcopy(computer)
+            newcomp = computer.fork()
             newcomp.set_input(3)
             frontier.append((newcomp, 3, ny, nx))
         if nx < xmax and (ny, nx + 1) not in walls | seen:
-            newcomp = deepcopy(computer)
+            newcomp = computer.fork()
             newcomp.set_input(4)
             frontier.append((newcomp, 4, ny, nx))
 
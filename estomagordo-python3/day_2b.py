@@ -29,6 +29,17 @@ def solve(d):
         for verb in range(100):
             if solve_part(list(d), noun, verb) == 19690720:
                 return 100 * noun + verb
+
+
+def solve_batch(d):
+    from batch import BatchComputer
+
+    computer = BatchComputer(d, 10000)
+    computer.poke(1, [noun for noun in range(100) for verb in range(100)])
+    computer.poke(2, [verb for noun in range(100) for verb in range(100)])
+    computer.run()
+
+    return list(computer.peek(0)).index(19690720)
     
 
 def read_and_solve():
@@ -4,38 +4,95 @@ from heapq import heappop, heappush
 from collections import Counter, defaultdict
 
 
-def wire_to_places(wire):
-    places = {}
+def wire_to_segments(wire):
+    segments = []
+    x, y = 0, 0
     steps = 0
 
-    pos = [0, 0]
-
     for instruction in wire:
         direction = instruction[0]
         dist = int(instruction[1:])
+        dx, dy = {'R': (1, 0), 'L': (-1, 0), 'U': (0, 1), 'D': (0, -1)}[direction]
+        nx, ny = x + dx * dist, y + dy * dist
+        segments.append((x, y, nx, ny, steps))
+        x, y = nx, ny
+        steps += dist
+
+    return segments
+
+
+def overlap(a, b):
+    ax1, ay1, ax2, ay2, _ = a
+    bx1, by1, bx2, by2, _ = b
+    xlo, xhi = max(min(ax1, ax2), min(bx1, bx2)), min(max(ax1, ax2), max(bx1, bx2))
+    ylo, yhi = max(min(ay1, ay2), min(by1, by2)), min(max(ay1, ay2), max(by1, by2))
+
+    if xlo > xhi or ylo > yhi:
+        return None
+
+    return xlo, xhi, ylo, yhi
+
+
+def steps_to(segment, x, y):
+    return segment[4] + abs(x - segment[0]) + abs(y - segment[1])
+
+
+def crossings(wires, cell=None):
+    segmented = [wire_to_segments(wire) for wire in wires]
+    total = sum(abs(s[2] - s[0]) + abs(s[3] - s[1]) for segments in segmented for s in segments)
+    count = sum(len(segments) for segments in segmented)
+    cell = cell or max(1, total // max(1, count))
+    grid = defaultdict(list)
 
-        delta = [1, 0]
+    for i, segments in enumerate(segmented):
+        for segment in segments:
+            x1, y1, x2, y2, _ = segment
 
-        if direction == 'R':
-            delta = [0, 1]
-        if direction == 'L':
-            delta = [0, -1]
-        if direction == 'D':
-            delta = [-1, 0]
+            for gx in range(min(x1, x2) // cell, max(x1, x2) // cell + 1):
+                for gy in range(min(y1, y2) // cell, max(y1, y2) // cell + 1):
+                    grid[gx, gy].append((i, segment))
 
-        for _ in range(dist):
-            steps += 1
-            pos = [pos[0] + delta[0], pos[1] + delta[1]]
-            places[tuple(pos)] = steps
+    found = []
 
-    return places
+    for (gx, gy), bucket in grid.items():
+        for j, (i, a) in enumerate(bucket):
+            for k, b in bucket[j + 1:]:
+                if i == k:
+                    continue
+
+                shared = overlap(a, b)
+
+                if not shared:
+                    continue
+
+                # Clipped to the cell, so only the bucket holding a point reports it
+                xlo, xhi, ylo, yhi = shared
+                xs = range(max(xlo, gx * cell), min(xhi, gx * cell + cell - 1) + 1)
+                ys = range(max(ylo, gy * cell), min(yhi, gy * cell + cell - 1) + 1)
+
+                for x in xs:
+                    for y in ys:
+                        asteps, bsteps = steps_to(a, x, y), steps_to(b, x, y)
+
+                        # A segment's start is the end of the one before it, or the origin
+                        if asteps > a[4] and bsteps > b[4]:
+                            first, second = (i, k) if i < k else (k, i)
+                            found.append((first, second, (x, y), asteps + bsteps))
+
+    return found
 
 
 def solve(wires):
-    aplaces = wire_to_places(wires[0].split(','))
-    bplaces = wire_to_places(wires[1].split(','))
-    
-    return min(aplaces[k] + bplaces[k] for k in aplaces.keys() & bplaces.keys())
+    return min(steps for _, _, _, steps in crossings([wire.split(',') for wire in wires[:2]]))
+
+
+def solve_many(wires):
+    best = {}
+
+    for a, b, _, steps in crossings([wire.split(',') for wire in wires]):
+        best[a, b] = min(best.get((a, b), steps), steps)
+
+    return best
 
 def read_and_solve():
     with open('input_3.txt') as f:
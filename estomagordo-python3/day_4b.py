@@ -5,31 +5,36 @@ from heapq import heappop, heappush
 from collections import Counter, defaultdict
 
 
-def solve(d):
-    lo, hi = d
-    met = 0
+def count_upto(n, exact):
+    if n <= 0:
+        return 0
+
+    # (previous digit, run length capped at 3, pair seen, still tight), -1 before the first nonzero digit
+    states = Counter({(-1, 0, False, True): 1})
+
+    for top in map(int, str(n)):
+        nxt = Counter()
 
-    for x in range(lo, hi + 1):
-        s = str(x)
+        for (prev, run, paired, tight), ways in states.items():
+            for digit in range(max(prev, 0), (top if tight else 9) + 1):
+                still = tight and digit == top
 
-        trueadj = False
-        nondec = True
-        
-        for i, c in enumerate(s):
-            if i == 0:
-                continue
+                if prev == -1:
+                    nxt[(-1, 0, False, still) if digit == 0 else (digit, 1, False, still)] += ways
+                elif digit == prev:
+                    nxt[(digit, min(run + 1, 3), paired, still)] += ways
+                else:
+                    nxt[(digit, 1, paired or run == 2 or (not exact and run > 2), still)] += ways
 
-            if int(c) < int(s[i - 1]):
-                nondec = False
-                break
+        states = nxt
 
-            if len(set(s[i-1:i+1])) == 1 and (i == len(s) - 1 or s[i + 1] != c) and (i == 1 or s[i - 2] != c):
-                trueadj = True
+    return sum(ways for (prev, run, paired, _), ways in states.items() if prev != -1 and (paired or run == 2 or (not exact and run > 2)))
 
-        if trueadj and nondec:
-            met += 1
 
-    return met
+def solve(d, exact=True):
+    lo, hi = d
+
+    return count_upto(hi, exact) - count_upto(lo - 1, exact)
     
 
 def read_and_solve():
@@ -5,16 +5,60 @@ from heapq import heappop, heappush
 from collections import Counter, defaultdict
 
 
-def pathize(graph, node):
-    path = {}
-    runlen = 0
+def depthize(graph):
+    depth = {'STOP': -1}
 
-    while node in graph:
-        runlen += 1
-        node = graph[node]
-        path[node] = runlen
+    for node in graph:
+        chain = []
 
-    return path
+        while node not in depth:
+            chain.append(node)
+            node = graph[node]
+
+        for step, link in enumerate(reversed(chain), 1):
+            depth[link] = depth[node] + step
+
+    return depth
+
+
+def build_index(graph):
+    depth = depthize(graph)
+    up = [dict(graph, STOP='STOP')]
+
+    for _ in range(max(depth.values()).bit_length()):
+        prev = up[-1]
+        up.append({node: prev[parent] for node, parent in prev.items()})
+
+    return depth, up
+
+
+def lca(index, a, b):
+    depth, up = index
+
+    if depth[a] < depth[b]:
+        a, b = b, a
+
+    diff = depth[a] - depth[b]
+
+    for k in range(diff.bit_length()):
+        if diff >> k & 1:
+            a = up[k][a]
+
+    if a == b:
+        return a
+
+    for k in reversed(range(len(up))):
+        if up[k][a] != up[k][b]:
+            a, b = up[k][a], up[k][b]
+
+    return up[0][a]
+
+
+def transfers(index, a, b):
+    depth, up = index
+    a, b = up[0][a], up[0][b]
+
+    return depth[a] + depth[b] - 2 * depth[lca(index, a, b)]
 
 
 def solve(d):
@@ -26,18 +70,7 @@ def solve(d):
         if a not in graph:
             graph[a] = 'STOP'
 
-    you_orbits = pathize(graph, graph['YOU'])
-    san_orbits = pathize(graph, graph['SAN'])
-
-    best = 10**10
-
-    for k, v in you_orbits.items():
-        if k not in san_orbits:
-            continue
-
-        best = min(best, v + san_orbits[k])
-
-    return best
+    return transfers(build_index(graph), 'YOU', 'SAN')
 
 def read_and_solve():
     with open('input_6.txt') as f:
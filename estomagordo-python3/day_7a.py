@@ -43,6 +43,22 @@ def solve(d, lo, hi, ampcount):
     return best
 
 
+def solve_batch(d, lo, hi, ampcount):
+    from batch import BatchComputer
+
+    perms = list(permutations(range(lo, hi)))
+    signals = [0] * len(perms)
+
+    for pos in range(ampcount):
+        computer = BatchComputer(d, len(perms))
+        computer.feed([perm[pos] for perm in perms])
+        computer.feed(signals)
+        computer.run()
+        signals = computer.last_outputs()
+
+    return int(signals.max())
+
+
 def read_and_solve():
     with open('input_7.txt') as f:
         data = list(map(int, f.readline().split(',')))
@@ -1,48 +1,73 @@
+import os
 import re
 
+from concurrent.futures import ProcessPoolExecutor
 from heapq import heappop, heappush
 from collections import Counter, defaultdict
-from itertools import permutations
+from itertools import permutations, repeat
 from intcode import Computer
 
+def amplify(d, perm, ampcount):
+    computers = [Computer(d, None) for _ in range(ampcount)]
+    signals = [0]
+    retcode = 0
+
+    for pos in range(ampcount):
+        computers[pos].queue_input(perm[pos])
+
+    while retcode != -1:
+        for computer in computers:
+            computer.queue_input(*signals)
+            retcode, signals = computer.run()
+
+    return signals[-1]
+
+
 def solve(d, lo, hi, ampcount):
     best = 0
 
     for perm in permutations(range(lo, hi)):
-        computers = [Computer(d, perm[pos]) for pos in range(ampcount)]
-        inp = 0
-        step = 0
+        best = max(best, amplify(d, perm, ampcount))
+
+    return best
 
-        while True:
-            computer = computers[step % ampcount]
-            
-            if step < ampcount:
-                computer.set_input(perm[step])
-            else:
-                computer.set_input(inp)
 
-            retcode, retval = 0, 0
+worker_program = None
+worker_ampcount = None
 
-            while retcode == 0:
-                retcode, retval = computer.step()
 
-                if step < ampcount and retcode == 0 and retval == 3:
-                    computer.set_input(inp)
+def init_worker(d, ampcount):
+    global worker_program, worker_ampcount
 
-                if retcode == 1:
-                    inp = retval
+    worker_program = d
+    worker_ampcount = ampcount
 
-            if retcode == -1:
-                break
 
-            step += 1
+def best_with_prefix(prefix, phases):
+    rest = [phase for phase in phases if phase not in prefix]
+    best = (-1, None)
 
-        best = max(best, inp)
-        
+    for tail in permutations(rest, worker_ampcount - len(prefix)):
+        perm = prefix + tail
+        best = max(best, (amplify(worker_program, perm, worker_ampcount), perm))
 
     return best
 
 
+def solve_parallel(d, lo, hi, ampcount, workers=None):
+    if not workers:
+        workers = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+
+    phases = list(range(lo, hi))
+    depth = 1 if len(phases) >= 4 * workers or ampcount < 2 else 2
+    prefixes = list(permutations(phases, depth))
+
+    with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(d, ampcount)) as executor:
+        results = executor.map(best_with_prefix, prefixes, repeat(phases))
+
+        return max(results)
+
+
 def read_and_solve():
     with open('input_7.txt') as f:
         data = list(map(int, f.readline().split(',')))
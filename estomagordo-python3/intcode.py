@@ -1,12 +1,85 @@
-from collections import defaultdict
+import mmap
+import os
+import struct
+
+from array import array
+from collections import defaultdict, deque
+from profiler import Profile
+
+
+MAGIC = b'INTCODE1'
+HEADER = struct.Struct('=8s8q')
+SHIFT = 8
+MASK = (1 << SHIFT) - 1
+ZERO_PAGE = (0,) * (1 << SHIFT)
+SIZES = {1: 4, 2: 4, 3: 2, 4: 2, 5: 3, 6: 3, 7: 4, 8: 4, 9: 2, 99: 1}
+
+
+def reader(mode, val):
+    if mode == 1:
+        return lambda program, relbase: val
+    if mode == 0:
+        page, offset = val >> SHIFT, val & MASK
+        return lambda program, relbase: program.pages[page][offset]
+    return lambda program, relbase: program[val + relbase]
+
+
+def writer(mode, val):
+    if mode == 0:
+        return lambda relbase: val
+    return lambda relbase: val + relbase
+
+
+def zero_page():
+    return ZERO_PAGE
+
+
+def fits(value):
+    return -(1 << 63) <= value < (1 << 63)
+
+
+class Memory:
+    def __init__(self, pages=None):
+        self.pages = pages if pages is not None else defaultdict(zero_page)
+        self.owned = set()
+
+    def __getitem__(self, address):
+        return self.pages[address >> SHIFT][address & MASK]
+
+    def __setitem__(self, address, value):
+        index = address >> SHIFT
+
+        if index not in self.owned:
+            try:
+                self.pages[index] = array('q', self.pages[index])
+            except OverflowError:
+                self.pages[index] = list(self.pages[index])
+            self.owned.add(index)
+
+        try:
+            self.pages[index][address & MASK] = value
+        except OverflowError:
+            self.pages[index] = list(self.pages[index])
+            self.pages[index][address & MASK] = value
+
+    def fork(self):
+        self.owned = set()
+
+        return Memory(self.pages.copy())
+
 
 class Computer:
     def __init__(self, program, input, startval=None):
         self.input = input
-        self.program = defaultdict(int)
+        self.queue = deque()
+        self.program = Memory()
         self.p = 0
         self.relbase = 0
         self.steps = 0
+        self.decoded = {}
+        self.covered = {}
+        self.shared_cache = False
+        self.profile = None
 
         for i, v in enumerate(program):
             self.program[i] = v
@@ -14,76 +87,321 @@ class Computer:
         if startval:
             self.program[0] = startval
 
-    def step(self):
-        self.steps += 1
-        amode = (self.program[self.p] % 1000) // 100
-        bmode = (self.program[self.p] % 10000) // 1000
-        cmode = (self.program[self.p] % 100000) // 10000
+    def decode(self, p):
+        instruction = self.program[p]
+        opcode = instruction % 100
+        amode = (instruction % 1000) // 100
+        bmode = (instruction % 10000) // 1000
+        cmode = (instruction % 100000) // 10000
+        size = SIZES.get(opcode, 1)
 
-        a = self.program[self.p + 1] if amode == 1 else self.program[self.program[self.p + 1]] if amode == 0 else self.program[self.program[self.p + 1] + self.relbase]
-        b = self.program[self.p + 2] if bmode == 1 else self.program[self.program[self.p + 2]] if bmode == 0 else self.program[self.program[self.p + 2] + self.relbase]
-        c = self.program[self.p + 3] if cmode == 1 else self.program[self.program[self.p + 3]] if cmode == 0 else self.program[self.program[self.p + 3] + self.relbase]
+        a = self.program[p + 1] if size > 1 else 0
+        b = self.program[p + 2] if size > 2 else 0
+        c = self.program[p + 3] if size > 3 else 0
 
-        instruction = self.program[self.p]
+        if opcode == 3:
+            ops = (writer(amode, a), None, None)
+        elif opcode in (1, 2, 7, 8):
+            ops = (reader(amode, a), reader(bmode, b), writer(cmode, c))
+        else:
+            ops = (reader(amode, a), reader(bmode, b), None)
 
-        if instruction % 100 == 99:
-            return -1, 99
-        elif instruction % 100 == 1:
-            if cmode == 0:
-                self.program[self.program[self.p + 3]] = a + b
-            else:
-                self.program[self.program[self.p + 3] + self.relbase] = a + b
-            self.p += 4
-        elif instruction % 100 == 2:
-            if cmode == 0:
-                self.program[self.program[self.p + 3]] = a * b
-            else:
-                self.program[self.program[self.p + 3] + self.relbase] = a * b
-            self.p += 4
-        elif instruction % 100 == 3:
-            if amode == 0:
-                self.program[self.program[self.p + 1]] = self.input
-            else:
-                self.program[self.program[self.p + 1] + self.relbase] = self.input
-            self.p += 2
-        elif instruction % 100 == 4:
-            self.p += 2
-            return 1, a                
-        elif instruction % 100 == 5:
-            if a != 0:
-                self.p = b
+        entry = (opcode, (amode, bmode, cmode), size) + ops
+        self.unshare_cache()
+        self.decoded[p] = entry
+
+        self.cover(p, p + size)
+
+        return entry
+
+    def cover(self, start, end):
+        for address in range(start, end):
+            owners = self.covered.get(address, ())
+
+            if start not in owners:
+                self.covered[address] = owners + (start,)
+
+    def unshare_cache(self):
+        if self.shared_cache:
+            self.decoded = dict(self.decoded)
+            self.covered = dict(self.covered)
+            self.shared_cache = False
+
+    def invalidate(self, address):
+        self.unshare_cache()
+
+        for p in self.covered.pop(address):
+            self.decoded.pop(p, None)
+
+    def write(self, address, value):
+        self.program[address] = value
+
+        if address in self.covered:
+            self.invalidate(address)
+
+    def save(self, path):
+        queue = array('q')
+        indices = array('q')
+        image = array('q')
+        # Values too wide for a word are saved as 0 and listed in the blob, keyed by
+        # their address, by i for the input or by q and their position in the queue
+        overflow = []
+
+        for i, value in enumerate(self.queue):
+            if fits(value):
+                queue.append(value)
             else:
-                self.p += 3
-        elif instruction % 100 == 6:
-            if a == 0:
-                self.p = b
+                queue.append(0)
+                overflow.append(f'q{i}:{value}')
+
+        for index in sorted(self.program.pages):
+            page = self.program.pages[index]
+
+            if not any(page):
+                continue
+
+            indices.append(index)
+
+            try:
+                image.extend(array('q', page))
+            except OverflowError:
+                for offset, value in enumerate(page):
+                    if fits(value):
+                        image.append(value)
+                    else:
+                        image.append(0)
+                        overflow.append(f'{(index << SHIFT) + offset}:{value}')
+
+        has_input = self.input is not None
+        input = self.input if has_input else 0
+
+        if not fits(input):
+            overflow.append(f'i:{input}')
+            input = 0
+
+        blob = ','.join(overflow).encode()
+        header = HEADER.pack(MAGIC, self.p, self.relbase, self.steps, has_input, input, len(queue), len(indices), len(blob))
+
+        with open(path + '.tmp', 'wb') as f:
+            f.write(header)
+            f.write(queue.tobytes())
+            f.write(indices.tobytes())
+            f.write(image.tobytes())
+            f.write(blob)
+
+        os.replace(path + '.tmp', path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, p, relbase, steps, has_input, input, queued, pagecount, blobsize = HEADER.unpack_from(mapped)
+
+        if magic != MAGIC:
+            raise ValueError(f'{path} is not an intcode checkpoint')
+
+        pagesize = 1 << SHIFT
+        wordcount = queued + pagecount + pagecount * pagesize
+        words = memoryview(mapped)[HEADER.size:HEADER.size + 8 * wordcount].cast('q')
+        blob = mapped[HEADER.size + 8 * wordcount:HEADER.size + 8 * wordcount + blobsize]
+
+        computer = cls([], input if has_input else None)
+        computer.p = p
+        computer.relbase = relbase
+        computer.steps = steps
+        computer.queue.extend(words[:queued])
+        data = words[queued + pagecount:]
+
+        for i, index in enumerate(words[queued:queued + pagecount]):
+            computer.program.pages[index] = data[i * pagesize:(i + 1) * pagesize]
+
+        for entry in blob.decode().split(',') if blob else []:
+            key, value = entry.split(':')
+
+            if key == 'i':
+                computer.input = int(value)
+            elif key[0] == 'q':
+                computer.queue[int(key[1:])] = int(value)
             else:
-                self.p += 3
-        elif instruction % 100 == 7:
-            cc = 1 if a < b else 0
-            if cmode == 0:
-                self.program[self.program[self.p + 3]] = cc
+                computer.program[int(key)] = int(value)
+
+        return computer
+
+    def fork(self):
+        child = type(self).__new__(type(self))
+        child.__dict__.update(self.__dict__)
+        child.program = self.program.fork()
+        child.queue = deque(self.queue)
+        child.profile = None if self.profile is None else Profile()
+        self.shared_cache = child.shared_cache = True
+
+        return child
+
+    def step(self):
+        self.steps += 1
+        p = self.p
+        entry = self.decoded.get(p)
+
+        if entry is None:
+            entry = self.decode(p)
+
+        opcode, _, size, a, b, c = entry
+        program = self.program
+        relbase = self.relbase
+        retcode, retval = 0, opcode
+
+        if opcode == 99:
+            retcode = -1
+        elif opcode == 1:
+            self.write(c(relbase), a(program, relbase) + b(program, relbase))
+            self.p = p + 4
+        elif opcode == 2:
+            self.write(c(relbase), a(program, relbase) * b(program, relbase))
+            self.p = p + 4
+        elif opcode == 3:
+            self.write(a(relbase), self.queue.popleft() if self.queue else self.input)
+            self.p = p + 2
+        elif opcode == 4:
+            self.p = p + 2
+            retcode, retval = 1, a(program, relbase)
+        elif opcode == 5:
+            if a(program, relbase) != 0:
+                self.p = b(program, relbase)
             else:
-                self.program[self.program[self.p + 3] + self.relbase] = cc
-            self.p += 4
-        elif instruction % 100 == 8:
-            cc = 1 if a == b else 0
-            if cmode == 0:
-                self.program[self.program[self.p + 3]] = cc
+                self.p = p + 3
+        elif opcode == 6:
+            if a(program, relbase) == 0:
+                self.p = b(program, relbase)
             else:
-                self.program[self.program[self.p + 3] + self.relbase] = cc
-            self.p += 4
-        elif instruction % 100 == 9:
-            self.relbase += a
-            self.p += 2
+                self.p = p + 3
+        elif opcode == 7:
+            self.write(c(relbase), 1 if a(program, relbase) < b(program, relbase) else 0)
+            self.p = p + 4
+        elif opcode == 8:
+            self.write(c(relbase), 1 if a(program, relbase) == b(program, relbase) else 0)
+            self.p = p + 4
+        elif opcode == 9:
+            self.relbase += a(program, relbase)
+            self.p = p + 2
         else:
-            print('uh oh', self.program[self.p])
+            print('uh oh', program[p])
 
-        return 0, instruction % 100
+        if self.profile is not None:
+            self.profile.record(p, opcode, self.p)
+
+        return retcode, retval
+
+    def enable_profiling(self):
+        self.profile = Profile()
+
+        return self.profile
+
+    def run_profiled(self, batch=None):
+        outputs = []
+
+        while True:
+            if self.program[self.p] % 100 == 3 and not self.queue:
+                return 3, outputs
+
+            retcode, retval = self.step()
+
+            if retcode == -1:
+                return -1, outputs
+            if retcode == 1:
+                outputs.append(retval)
+                if len(outputs) == batch:
+                    return 1, outputs
+
+    def run(self, batch=None):
+        if self.profile is not None:
+            return self.run_profiled(batch)
+
+        program = self.program
+        decoded = self.decoded
+        queue = self.queue
+        p = self.p
+        relbase = self.relbase
+        steps = self.steps
+        outputs = []
+        retcode = -1
+
+        while True:
+            entry = decoded.get(p)
+
+            if entry is None:
+                entry = self.decode(p)
+                decoded = self.decoded
+
+            opcode, _, size, a, b, c = entry
+
+            if opcode == 1:
+                address = c(relbase)
+                value = a(program, relbase) + b(program, relbase)
+            elif opcode == 2:
+                address = c(relbase)
+                value = a(program, relbase) * b(program, relbase)
+            elif opcode == 7:
+                address = c(relbase)
+                value = 1 if a(program, relbase) < b(program, relbase) else 0
+            elif opcode == 8:
+                address = c(relbase)
+                value = 1 if a(program, relbase) == b(program, relbase) else 0
+            elif opcode == 3:
+                if not queue:
+                    retcode = 3
+                    break
+                address = a(relbase)
+                value = queue.popleft()
+            elif opcode == 4:
+                outputs.append(a(program, relbase))
+                p += 2
+                steps += 1
+                if len(outputs) == batch:
+                    retcode = 1
+                    break
+                continue
+            elif opcode == 5:
+                p = b(program, relbase) if a(program, relbase) != 0 else p + 3
+                steps += 1
+                continue
+            elif opcode == 6:
+                p = b(program, relbase) if a(program, relbase) == 0 else p + 3
+                steps += 1
+                continue
+            elif opcode == 9:
+                relbase += a(program, relbase)
+                p += 2
+                steps += 1
+                continue
+            elif opcode == 99:
+                steps += 1
+                break
+            else:
+                print('uh oh', program[p])
+                break
+
+            program[address] = value
+
+            if address in self.covered:
+                self.invalidate(address)
+                decoded = self.decoded
+
+            p += size
+            steps += 1
+
+        self.p = p
+        self.relbase = relbase
+        self.steps = steps
+
+        return retcode, outputs
+
+    def queue_input(self, *values):
+        self.queue.extend(values)
 
     def get_output(self):
         retcode, retval = 0, 0
-        
+
         while retcode == 0:
             retcode, retval = self.step()
 
@@ -0,0 +1,249 @@
+from intcode import Computer, MASK, SHIFT, SIZES
+
+
+compiled = {}
+missing = object()
+STRAIGHT = {1, 2, 7, 8, 9}
+TERMINATORS = {4, 5, 6}
+
+
+def word(address):
+    return f'P[{address >> SHIFT}][{address & MASK}]'
+
+
+def relative(offset):
+    return f'P[(rb + {offset}) >> {SHIFT}][(rb + {offset}) & {MASK}]'
+
+
+def read_expr(mode, val, address, dynamic):
+    if address in dynamic:
+        raw = word(address)
+        if mode == 1:
+            return raw
+        if mode == 0:
+            return f'm[{raw}]'
+        return f'm[rb + {raw}]'
+
+    if mode == 1:
+        return str(val)
+    if mode == 0:
+        return word(val)
+    return relative(val)
+
+
+def target_expr(mode, val, address, dynamic):
+    raw = word(address) if address in dynamic else str(val)
+
+    return raw if mode == 0 else f'rb + {raw}'
+
+
+def fold(opcode, x, y):
+    if opcode == 1:
+        return x + y
+    if opcode == 2:
+        return x * y
+    if opcode == 7:
+        return 1 if x < y else 0
+    return 1 if x == y else 0
+
+
+def value_expr(opcode, x, y):
+    if opcode == 1:
+        return f'{x} + {y}'
+    if opcode == 2:
+        return f'{x} * {y}'
+    if opcode == 7:
+        return f'1 if {x} < {y} else 0'
+    return f'1 if {x} == {y} else 0'
+
+
+def generate(start, words, dynamic):
+    lines = []
+    p = start
+    count = 0
+
+    while p - start < len(words):
+        instruction = words[p - start]
+        opcode = instruction % 100
+        amode = (instruction % 1000) // 100
+        bmode = (instruction % 10000) // 1000
+        cmode = (instruction % 100000) // 10000
+        size = SIZES[opcode]
+        a, b, c = (words[p - start + 1:p - start + size] + [0, 0, 0])[:3]
+        x = read_expr(amode, a, p + 1, dynamic)
+        y = read_expr(bmode, b, p + 2, dynamic)
+        static = p + 1 not in dynamic and p + 2 not in dynamic
+        count += 1
+        nxt = p + size
+
+        if opcode == 9:
+            lines.append(f'rb += {x}')
+        elif opcode in STRAIGHT:
+            if amode == 1 and bmode == 1 and static:
+                value = str(fold(opcode, a, b))
+            else:
+                value = value_expr(opcode, x, y)
+
+            lines.append(f'address = {target_expr(cmode, c, p + 3, dynamic)}')
+            lines.append(f'm[address] = {value}')
+            lines.append('if address in C:')
+            lines.append(f'    return {nxt}, rb, {count}, address')
+        elif opcode == 4:
+            lines.append(f'out.append({x})')
+        else:
+            test = '!=' if opcode == 5 else '=='
+
+            if amode == 1 and p + 1 not in dynamic:
+                if (a != 0) == (opcode == 5):
+                    lines.append(f'return {y}, rb, {count}, None')
+                    return lines
+            else:
+                lines.append(f'if {x} {test} 0:')
+                lines.append(f'    return {y}, rb, {count}, None')
+
+        p = nxt
+
+    lines.append(f'return {p}, rb, {count}, None')
+
+    return lines
+
+
+def compile_block(start, words, dynamic):
+    key = (start, tuple(words), dynamic)
+
+    if key not in compiled:
+        body = '\n'.join('    ' + line for line in generate(start, words, dynamic))
+        source = f'def block(m, P, C, rb, out):\n{body}\n'
+        namespace = {}
+        exec(compile(source, f'<intcode block {start}>', 'exec'), namespace)
+        compiled[key] = namespace['block']
+
+    return compiled[key]
+
+
+class JitComputer(Computer):
+    def __init__(self, program, input, startval=None):
+        super().__init__(program, input, startval)
+        self.blocks = {}
+        self.heads = {}
+        self.dynamic = set()
+
+    def unshare_cache(self):
+        if self.shared_cache:
+            self.blocks = dict(self.blocks)
+            self.heads = dict(self.heads)
+            self.dynamic = set(self.dynamic)
+
+        super().unshare_cache()
+
+    def invalidate(self, address):
+        self.unshare_cache()
+
+        for p in self.covered.get(address, ()):
+            if p not in self.blocks:
+                continue
+
+            if address in self.heads[p]:
+                self.blocks[p] = None
+            else:
+                self.dynamic.add(address)
+                del self.blocks[p]
+
+        super().invalidate(address)
+
+    def compile(self, start):
+        words = []
+        heads = [start]
+        p = start
+
+        while True:
+            opcode = self.program[p] % 100
+
+            if opcode not in STRAIGHT and opcode not in TERMINATORS:
+                break
+
+            heads.append(p)
+            words.extend(self.program[q] for q in range(p, p + SIZES[opcode]))
+            p += SIZES[opcode]
+
+            if opcode in TERMINATORS:
+                break
+
+        dynamic = frozenset(q for q in range(start, p) if q in self.dynamic)
+        block = compile_block(start, words, dynamic) if words else None
+        self.unshare_cache()
+        self.blocks[start] = block
+        self.heads[start] = frozenset(heads)
+
+        for address in range(start, max(p, start + 1)):
+            owners = self.covered.get(address, ())
+
+            if address not in dynamic and start not in owners:
+                self.covered[address] = owners + (start,)
+
+        return block
+
+    def run(self, batch=None):
+        if self.profile is not None:
+            return self.run_profiled(batch)
+
+        program = self.program
+        pages = program.pages
+        blocks = self.blocks
+        covered = self.covered
+        p = self.p
+        relbase = self.relbase
+        steps = self.steps
+        outputs = []
+        retcode = -1
+
+        while True:
+            block = blocks.get(p, missing)
+
+            if block is missing:
+                block = self.compile(p)
+                blocks = self.blocks
+                covered = self.covered
+
+            if block is None:
+                opcode = program[p] % 100
+
+                if opcode == 3 and not self.queue:
+                    retcode = 3
+                    break
+                if opcode not in SIZES:
+                    print('uh oh', program[p])
+                    break
+
+                self.p, self.relbase, self.steps = p, relbase, steps
+                code, val = self.step()
+                p, relbase, steps = self.p, self.relbase, self.steps
+                blocks = self.blocks
+                covered = self.covered
+
+                if code == -1:
+                    break
+                if code == 1:
+                    outputs.append(val)
+                    if len(outputs) == batch:
+                        retcode = 1
+                        break
+                continue
+
+            p, relbase, executed, dirty = block(program, pages, covered, relbase, outputs)
+            steps += executed
+
+            if dirty is not None:
+                self.invalidate(dirty)
+                blocks = self.blocks
+                covered = self.covered
+
+            if outputs and len(outputs) == batch:
+                retcode = 1
+                break
+
+        self.p = p
+        self.relbase = relbase
+        self.steps = steps
+
+        return retcode, outputs
@@ -0,0 +1,79 @@
+from collections import Counter
+
+
+NAMES = {1: 'add', 2: 'mul', 3: 'in', 4: 'out', 5: 'jnz', 6: 'jz', 7: 'lt', 8: 'eq', 9: 'arb', 99: 'halt'}
+
+
+class Profile:
+    def __init__(self):
+        self.opcodes = Counter()
+        self.pcs = Counter()
+        self.ops = {}
+        self.taken = Counter()
+        self.not_taken = Counter()
+        self.loops = Counter()
+
+    def record(self, p, opcode, nxt):
+        self.opcodes[opcode] += 1
+        self.pcs[p] += 1
+        self.ops[p] = opcode
+
+        if opcode == 5 or opcode == 6:
+            if nxt == p + 3:
+                self.not_taken[p] += 1
+            else:
+                self.taken[p] += 1
+                if nxt <= p:
+                    self.loops[(nxt, p)] += 1
+
+    def hot_loops(self, count=5):
+        return self.loops.most_common(count)
+
+    def loop_of(self, p):
+        for (start, end), _ in self.loops.most_common():
+            if start <= p <= end:
+                return start, end
+
+        return None
+
+    def report(self, count=10):
+        total = sum(self.opcodes.values())
+        lines = ['opcode name      count   share']
+
+        for opcode, hits in self.opcodes.most_common():
+            lines.append(f'{opcode:6} {NAMES.get(opcode, "?"):5} {hits:10} {100 * hits / total:6.2f}%')
+
+        lines.append('')
+        lines.append('    pc      count')
+
+        for p, hits in self.pcs.most_common(count):
+            lines.append(f'{p:6} {hits:10}')
+
+        lines.append('')
+        lines.append('    pc      taken  not taken')
+
+        for p in sorted(self.taken.keys() | self.not_taken.keys()):
+            lines.append(f'{p:6} {self.taken[p]:10} {self.not_taken[p]:10}')
+
+        lines.append('')
+        lines.append('  loop           iterations')
+
+        for (start, end), hits in self.hot_loops(count):
+            lines.append(f'{start:6} - {end:<6} {hits:10}')
+
+        return '\n'.join(lines)
+
+    def collapsed(self):
+        lines = []
+
+        for p, hits in sorted(self.pcs.items()):
+            frames = []
+            loop = self.loop_of(p)
+
+            if loop:
+                frames.append(f'loop_{loop[0]}_{loop[1]}')
+
+            frames.append(f'{p}_{NAMES.get(self.ops[p], "?")}')
+            lines.append(f'{";".join(frames)} {hits}')
+
+        return '\n'.join(lines)
@@ -1,3 +1,6 @@
+import pytest
+
+
 def test_1a():
     import day_1a
 
@@ -26,6 +29,40 @@ def test_2b():
     assert(7960 == answer)
 
 
+def test_2b_batch():
+    pytest.importorskip('numpy')
+    import day_2b
+
+    with open('input_2.txt') as f:
+        data = list(map(int, f.readline().split(',')))
+
+    assert(7960 == day_2b.solve_batch(data))
+
+
+def test_batch_negative_address():
+    pytest.importorskip('numpy')
+    from batch import BatchComputer
+
+    computer = BatchComputer([4, -1, 99], 2)
+
+    with pytest.raises(IndexError):
+        computer.run()
+
+
+def test_batch_overflow():
+    pytest.importorskip('numpy')
+    from batch import BatchComputer
+
+    for program in ([1002, 7, 3, 7, 4, 7, 99, 1 << 62], [1001, 7, 1 << 62, 7, 4, 7, 99, 1 << 62],
+                    [1002, 7, -1, 7, 4, 7, 99, -(1 << 63)]):
+        with pytest.raises(OverflowError):
+            BatchComputer(program, 2).run()
+
+    computer = BatchComputer([1002, 7, -7, 7, 4, 7, 99, 1 << 60], 2)
+    computer.run()
+    assert([-(7 << 60)] * 2 == list(computer.last_outputs()))
+
+
 def test_3a():
     import day_3a
 
@@ -39,6 +76,17 @@ def test_3b():
     answer = day_3b.read_and_solve()
     assert(122514 == answer)
 
+def test_3b_many():
+    import day_3b
+
+    wires = ['R8,U5,L5,D3', 'U7,R6,D4,L4', 'R75,D30,R83,U83,L12,D49,R71,U7,L72', 'U62,R66,U55,R34,D71,R55,D58,R83']
+    assert({(0, 1): 30, (0, 2): 2, (1, 3): 2, (2, 3): 610} == day_3b.solve_many(wires))
+
+    # Overlapping runs report every shared point once, but never the origin
+    found = day_3b.crossings([['R5'], ['R3', 'L1']], cell=2)
+    assert([(1, 2), (2, 4), (2, 6), (3, 6)] == sorted((x, steps) for _, _, (x, _), steps in found))
+
+
 def test_4a():
     import day_4a
 
@@ -87,6 +135,16 @@ def test_7a():
     assert(277328 == answer)
 
 
+def test_7a_batch():
+    pytest.importorskip('numpy')
+    import day_7a
+
+    with open('input_7.txt') as f:
+        data = list(map(int, f.readline().split(',')))
+
+    assert(277328 == day_7a.solve_batch(data, 0, 5, 5))
+
+
 def test_7b():
     import day_7b
 
@@ -94,6 +152,17 @@ def test_7b():
     assert(11304734 == answer)
 
 
+def test_7b_parallel():
+    import day_7b
+
+    with open('input_7.txt') as f:
+        data = list(map(int, f.readline().split(',')))
+
+    signal, perm = day_7b.solve_parallel(data, 5, 10, 5, workers=2)
+    assert(11304734 == signal)
+    assert(signal == day_7b.amplify(data, perm, 5))
+
+
 def test_8a():
     import day_8a
 
@@ -226,4 +295,208 @@ def test_16b():
     import day_16b
 
     answer = day_16b.read_and_solve()
-    assert(83253465 == answer)
\ No newline at end of file
+    assert(83253465 == answer)
+
+
+def test_profile():
+    from intcode import Computer
+
+    # Counts [10] down from 3, printing each value
+    computer = Computer([1001, 10, -1, 10, 4, 10, 1005, 10, 0, 99, 3], None)
+    profile = computer.enable_profiling()
+    retcode, outputs = computer.run()
+
+    assert((-1, [2, 1, 0]) == (retcode, outputs))
+    assert(3 == profile.opcodes[1] == profile.opcodes[4] == profile.opcodes[5])
+    assert(2 == profile.taken[6] and 1 == profile.not_taken[6])
+    assert([((0, 6), 2)] == profile.hot_loops())
+    assert('     6          2          1' in profile.report().split('\n'))
+    assert('loop_0_6;0_add 3' in profile.collapsed().split('\n'))
+    assert('9_halt 1' in profile.collapsed().split('\n'))
+
+
+def test_fork_gets_own_profile():
+    from intcode import Computer
+
+    computer = Computer([1001, 10, -1, 10, 4, 10, 1005, 10, 0, 99, 3], None)
+    profile = computer.enable_profiling()
+    computer.run(1)
+    child = computer.fork()
+
+    assert(child.profile is not profile)
+    child.run()
+    assert(1 == profile.opcodes[4])
+    assert(2 == child.profile.opcodes[4])
+
+
+def test_checkpoint_round_trip(tmp_path):
+    from intcode import Computer
+
+    # Squares [20] into [21], echoes one input, then echoes one into [300]
+    program = [2, 20, 20, 21, 3, 22, 4, 22, 3, 300, 4, 300, 99] + [0] * 7 + [1 << 40] + [0] * 279 + [-1]
+    computer = Computer(program, None)
+    computer.queue_input(5)
+    assert((3, [5]) == computer.run())
+    computer.queue_input(7, 8)
+
+    path = str(tmp_path / 'checkpoint')
+    computer.save(path)
+    loaded = Computer.load(path)
+
+    assert((8, 0, computer.steps) == (loaded.p, loaded.relbase, loaded.steps))
+    assert([7, 8] == list(loaded.queue))
+    assert(1 << 80 == loaded.program[21])
+    assert(-1 == loaded.program[300])
+    assert(isinstance(loaded.program.pages[1], memoryview))
+
+    assert((-1, [7]) == loaded.run())
+    assert([8] == list(loaded.queue))
+    assert(7 == loaded.program[300])
+    assert(not isinstance(loaded.program.pages[1], memoryview))
+
+    again = Computer.load(path)
+    assert(-1 == again.program[300])
+    assert((-1, [7]) == again.run())
+
+
+def test_checkpoint_big_input(tmp_path):
+    from intcode import Computer
+
+    # Echoes two inputs, stepping reads the fixed input once the queue is empty
+    computer = Computer([3, 9, 4, 9, 3, 9, 4, 9, 99, 0], 1 << 70)
+    computer.queue_input(-(1 << 80))
+    path = str(tmp_path / 'checkpoint')
+    computer.save(path)
+    loaded = Computer.load(path)
+
+    assert(1 << 70 == loaded.input)
+    assert([-(1 << 80)] == list(loaded.queue))
+    assert((3, [-(1 << 80)]) == loaded.run())
+    loaded.step()
+    assert((-1, [1 << 70]) == loaded.run())
+
+
+def test_operand_rewrite_drops_decoded():
+    from intcode import Computer
+
+    # Prints [1], patches its operand to 2, then loops once through it again
+    program = [104, 1, 1101, 0, 2, 1, 1006, 17, 16, 1101, 0, 0, 17, 1105, 1, 0, 99, 1]
+
+    computer = Computer(program, None)
+    assert((1, [1]) == computer.run(1))
+    assert(0 in computer.decoded and 0 in computer.covered[1])
+    computer.write(1, 2)
+    assert(0 not in computer.decoded and 1 not in computer.covered)
+
+    for profiled in (False, True):
+        computer = Computer(program, None)
+        if profiled:
+            computer.enable_profiling()
+        assert((-1, [1, 2]) == computer.run())
+
+
+def test_opcode_rewrite_drops_decoded():
+    from intcode import Computer
+
+    # Prints 7, overwrites its own output instruction with a halt and jumps back
+    program = [104, 7, 1101, 0, 99, 0, 1105, 1, 0]
+
+    for profiled in (False, True):
+        computer = Computer(program, None)
+        if profiled:
+            computer.enable_profiling()
+        assert((-1, [7]) == computer.run(2))
+        assert(99 == computer.decoded[0][0])
+
+
+def test_fork_isolates_memory():
+    from intcode import Computer
+
+    # Echoes every input through [9]
+    computer = Computer([3, 9, 4, 9, 1105, 1, 0, 99, 0, 0], None)
+    computer.queue_input(5)
+    assert((3, [5]) == computer.run())
+    child = computer.fork()
+
+    child.queue_input(6)
+    assert((3, [6]) == child.run())
+    assert((5, 6) == (computer.program[9], child.program[9]))
+
+    computer.queue_input(7)
+    assert((3, [7]) == computer.run())
+    computer.write(8, 1)
+    assert((7, 6) == (computer.program[9], child.program[9]))
+    assert((1, 0) == (computer.program[8], child.program[8]))
+
+
+def test_fork_unshares_decoded_on_code_write():
+    from intcode import Computer
+
+    for writer_is_child in (True, False):
+        computer = Computer([3, 9, 4, 9, 1105, 1, 0, 99, 0, 0], None)
+        computer.queue_input(5)
+        computer.run()
+        child = computer.fork()
+        assert(child.decoded is computer.decoded and child.covered is computer.covered)
+
+        # Pointing the output at [7] only changes the writer's program
+        writer, other = (child, computer) if writer_is_child else (computer, child)
+        writer.write(3, 7)
+
+        assert(writer.decoded is not other.decoded and writer.covered is not other.covered)
+        assert(not writer.shared_cache)
+        assert(2 not in writer.decoded and 2 in other.decoded and 3 in other.covered)
+
+        writer.queue_input(6)
+        other.queue_input(6)
+        assert((3, [99]) == writer.run())
+        assert((3, [6]) == other.run())
+
+
+def test_jit_opcode_rewrite_falls_back():
+    from jit import JitComputer
+
+    # Prints 7, switches its output to position mode, which prints [7], and loops
+    computer = JitComputer([104, 7, 1101, 0, 4, 0, 1105, 1, 0], None)
+
+    assert((1, [7, 1, 1]) == computer.run(3))
+    assert(computer.blocks[0] is None)
+    assert(4 == computer.decoded[0][0])
+
+
+def test_jit_operand_rewrite_recompiles():
+    from jit import JitComputer
+
+    # Prints the operand at [1] and increments it until it reaches 3
+    computer = JitComputer([104, 0, 1001, 1, 1, 1, 1007, 1, 3, 20, 1005, 20, 0, 99], None)
+
+    assert((-1, [0, 1, 2]) == computer.run())
+    assert(1 in computer.dynamic and 1 not in computer.covered)
+    assert(computer.blocks[0] is not None)
+
+
+def test_jit_write_ends_block():
+    from jit import JitComputer
+
+    # The first instruction rewrites the operand of the output in the same block
+    computer = JitComputer([1101, 0, 5, 5, 104, 9, 99], None)
+
+    assert((-1, [5]) == computer.run())
+    assert(5 in computer.dynamic)
+    assert(3 == computer.steps)
+
+
+def test_jit_fork_gets_own_dynamic():
+    from jit import JitComputer
+
+    computer = JitComputer([104, 0, 1001, 1, 1, 1, 1007, 1, 3, 20, 1005, 20, 0, 99], None)
+    assert((1, [0]) == computer.run(1))
+    child = computer.fork()
+    block = computer.blocks[0]
+
+    assert((-1, [1, 2]) == child.run())
+    assert(1 in child.dynamic and 1 not in computer.dynamic)
+    assert(block is computer.blocks[0] and 1 in computer.covered)
+
+    assert((-1, [1, 2]) == computer.run())
+    assert(1 in computer.dynamic)
@@ -3,7 +3,7 @@
 # By Jakob Ruhe (jakob.ruhe@gmail.com) 2019-12-10
 
 import unittest
-from collections import namedtuple
+from collections import defaultdict, deque, namedtuple
 import math
 
 Point = namedtuple("Point", ('x', 'y'))
@@ -19,42 +19,21 @@ def parse_input(input: str):
     return asteroids
 
 
-def dist(p1, p2):
-    return math.sqrt((p1.x - p2.x) * (p1.x - p2.x) + (p1.y - p2.y) * (p1.y - p2.y))
+def direction(p1, p2):
+    dx = p2.x - p1.x
+    dy = p2.y - p1.y
+    g = math.gcd(dx, dy)
+    return dx // g, dy // g
 
 
-def equals(a, b):
-    return abs(a-b) <= 1e-6
-
-
-def is_point_between(p, p1, p2):
-    if not equals(dist(p, p1) + dist(p, p2), dist(p1, p2)):
-        return False
-    if p.x < min(p1.x, p2.x) or p.x > max(p1.x, p2.x):
-        return False
-    if p.y < min(p1.y, p2.y) or p.y > max(p1.y, p2.y):
-        return False
-    return True
-
-
-def can_see(asteroid_points, p1, p2):
-    for p in asteroid_points:
-        if p == p1 or p == p2:
-            continue
-        if is_point_between(p, p1, p2):
-            return False
-    return True
+def count_visible(asteroid_points, station):
+    return len({direction(station, p) for p in asteroid_points if p != station})
 
 
 def solve1(puzzle_input):
     asteroids = parse_input(puzzle_input)
-    asteroids_left = list(asteroids.keys())
-    while asteroids_left:
-        p1 = asteroids_left.pop()
-        for p2 in asteroids_left:
-            if can_see(asteroids.keys(), p1, p2):
-                asteroids[p1] += 1
-                asteroids[p2] += 1
+    for p in asteroids:
+        asteroids[p] = count_visible(asteroids.keys(), p)
     best = max(asteroids.keys(), key=lambda key: asteroids[key])
     return asteroids[best], best
 
@@ -66,20 +45,23 @@ def angle(p1, p2):
 
 def solve2(puzzle_input, giant_laser_pos, num_to_destroy):
     asteroids = parse_input(puzzle_input)
-    asteroids_left = list(asteroids.keys())
-    asteroids_left.remove(giant_laser_pos)
+    # One queue per direction, nearest first, swept in order of angle
+    lines = defaultdict(list)
+    for p in asteroids:
+        if p != giant_laser_pos:
+            lines[direction(giant_laser_pos, p)].append(p)
+    queues = []
+    for d in sorted(lines, key=lambda d: angle(Point(0, 0), Point(*d))):
+        line = sorted(lines[d], key=lambda p: abs(p.x - giant_laser_pos.x) + abs(p.y - giant_laser_pos.y))
+        queues.append(deque(line))
     num_destroyed = 0
-    revolution = 0
-    while True:
-        while True:
-            candidates = list(filter(lambda p: can_see(asteroids_left, giant_laser_pos, p), asteroids_left))
-            candidates.sort(key=lambda p: angle(giant_laser_pos, p))
-            for p in candidates:
-                asteroids_left.remove(p)
-                num_destroyed += 1
-                if num_destroyed == num_to_destroy:
-                    return p
-            revolution += 1
+    while queues:
+        for queue in queues:
+            p = queue.popleft()
+            num_destroyed += 1
+            if num_destroyed == num_to_destroy:
+                return p
+        queues = [queue for queue in queues if queue]
     return None
 
 
@@ -159,6 +141,11 @@ class TestThis(unittest.TestCase):
             """), (210, Point(11, 13)))
 
 
+    def test_direction(self):
+        self.assertEqual(direction(Point(1, 1), Point(7, 4)), (2, 1))
+        self.assertEqual(direction(Point(1, 1), Point(1, -5)), (0, -1))
+        self.assertEqual(direction(Point(3, 3), Point(0, 0)), (-1, -1))
+
     def test2(self):
         self.assertEqual(
             solve2(
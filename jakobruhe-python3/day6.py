@@ -64,36 +64,48 @@ def solve1(root):
     return depth_sum(root, 0)
 
 
-def find_node(tree, name):
-    if tree.name == name:
-        return tree
-    for c in tree.children:
-        node = find_node(c, name)
-        if node is not None:
-            return node
-    return None
-
-
-def find_parents(node):
-    parents = []
-    while node.parent is not None:
-        parents.append(node.parent)
-        node = node.parent
-    return list(reversed(parents))
+# Binary lifting table over the tree for lowest common ancestor queries
+class LcaIndex:
+    def __init__(self, root):
+        self.index = {}
+        self.depth = []
+        parents = []
+        stack = [(root, -1)]
+        while stack:
+            node, parent = stack.pop()
+            self.index[node.name] = len(self.depth)
+            self.depth.append(0 if parent < 0 else self.depth[parent] + 1)
+            parents.append(parent)
+            for child in node.children:
+                stack.append((child, self.index[node.name]))
+        self.up = [parents]
+        for _ in range(max(self.depth).bit_length()):
+            prev = self.up[-1]
+            self.up.append([p if p < 0 else prev[p] for p in prev])
+
+    def lca(self, a, b):
+        if self.depth[a] < self.depth[b]:
+            a, b = b, a
+        diff = self.depth[a] - self.depth[b]
+        for k in range(diff.bit_length()):
+            if diff >> k & 1:
+                a = self.up[k][a]
+        if a == b:
+            return a
+        for k in reversed(range(len(self.up))):
+            if self.up[k][a] != self.up[k][b]:
+                a = self.up[k][a]
+                b = self.up[k][b]
+        return self.up[0][a]
+
+    def transfers(self, from_name, to_name):
+        a = self.up[0][self.index[from_name]]
+        b = self.up[0][self.index[to_name]]
+        return self.depth[a] + self.depth[b] - 2 * self.depth[self.lca(a, b)]
 
 
 def solve2(root, from_name, to_name):
-    from_node = find_node(root, from_name)
-    from_node_parents = find_parents(from_node)
-    to_node = find_node(root, to_name)
-    to_node_parents = find_parents(to_node)
-    num_common = 0
-    for i, n in enumerate(to_node_parents):
-        if n == from_node_parents[i]:
-            num_common += 1
-        else:
-            break
-    return len(from_node_parents) + len(to_node_parents) - num_common * 2
+    return LcaIndex(root).transfers(from_name, to_name)
 
 
 class TestThis(unittest.TestCase):
@@ -102,6 +114,14 @@ class TestThis(unittest.TestCase):
         self.assertEqual(solve1(build_tree(parse_input("A)B COM)A"))), 3)
         self.assertEqual(solve1(build_tree(parse_input("COM)B B)C C)D D)E E)F B)G G)H D)I E)J J)K K)L"))), 42)
 
+    def test2(self):
+        root = build_tree(parse_input("COM)B B)C C)D D)E E)F B)G G)H D)I E)J J)K K)L K)YOU I)SAN"))
+        self.assertEqual(solve2(root, "YOU", "SAN"), 4)
+        index = LcaIndex(root)
+        self.assertEqual(index.transfers("SAN", "YOU"), 4)
+        self.assertEqual(index.transfers("L", "H"), 6)
+        self.assertEqual(index.transfers("F", "J"), 0)
+
 
 if __name__ == "__main__":
     with open("input/day6.txt", "r") as f:
@@ -3,55 +3,148 @@
 from helpfunctions import *
 import unittest, sys
 import re
-from collections import namedtuple
-import matplotlib.pyplot as plt
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict, namedtuple
 
 Point = namedtuple('Point', ['x', 'y'])
+Segment = namedtuple('Segment', ['start', 'end', 'steps'])
+Crossing = namedtuple('Crossing', ['point', 'distance', 'steps'])
 
-def getCoordinatesForWire(wire, color=None):
-    coords = []
+def getSegmentsForWire(wire):
+    segments = []
     pos = Point(0,0)
+    steps = 0
 
     for path in wire:
         match = re.match(r"([A-Z])([0-9]+)", path)
         if match:
-            items = match.groups()
             direction = match.group(1)
             distance = int(match.group(2))
 
-            startPos = pos
-
-            for i in range(distance):
-                if direction == 'R':
-                    pos = Point(pos.x + 1, pos.y)
-                if direction == 'L':
-                    pos = Point(pos.x - 1, pos.y)
-                if direction == 'U':
-                    pos = Point(pos.x, pos.y + 1)
-                if direction == 'D':
-                    pos = Point(pos.x, pos.y - 1)
-
-                coords.append(pos)
-    return coords
-
-def plot(coordsA, coordsB):
-    for path in zip(coordsA, coordsA[1:]):
-        plt.plot([path[0].x, path[1].x], [path[0].y, path[1].y], 'ro-')
-    for path in zip(coordsB, coordsB[1:]):
-        plt.plot([path[0].x, path[1].x], [path[0].y, path[1].y], 'bo-')
-    plt.axis('equal')
+            if direction == 'R':
+                end = Point(pos.x + distance, pos.y)
+            if direction == 'L':
+                end = Point(pos.x - distance, pos.y)
+            if direction == 'U':
+                end = Point(pos.x, pos.y + distance)
+            if direction == 'D':
+                end = Point(pos.x, pos.y - distance)
+
+            segments.append(Segment(pos, end, steps))
+            pos = end
+            steps += distance
+    return segments
+
+def isHorizontal(segment):
+    return segment.start.y == segment.end.y
+
+def stepsTo(segment, point):
+    return segment.steps + abs(point.x - segment.start.x) + abs(point.y - segment.start.y)
+
+def crossing(segmentA, segmentB, point):
+    stepsA = stepsTo(segmentA, point)
+    stepsB = stepsTo(segmentB, point)
+    # The shared starting point is not a crossing
+    if stepsA == 0 or stepsB == 0:
+        return None
+    return Crossing(point, abs(point.x) + abs(point.y), stepsA + stepsB)
+
+def findPerpendicularCrossings(horizontals, verticals):
+    # Sweep over x, keeping the horizontal segments under the sweep line sorted on y
+    events = []
+    for i, segment in enumerate(horizontals):
+        x1, x2 = sorted((segment.start.x, segment.end.x))
+        events.append((x1, 0, i))
+        events.append((x2, 2, i))
+    for i, segment in enumerate(verticals):
+        events.append((segment.start.x, 1, i))
+    events.sort()
+
+    active = []
+    for x, kind, i in events:
+        if kind == 0:
+            insort(active, (horizontals[i].start.y, i))
+        elif kind == 2:
+            active.remove((horizontals[i].start.y, i))
+        else:
+            vertical = verticals[i]
+            y1, y2 = sorted((vertical.start.y, vertical.end.y))
+            for y, j in active[bisect_left(active, (y1, -1)):bisect_right(active, (y2, len(horizontals)))]:
+                yield horizontals[j], vertical, Point(x, y)
+
+def findCollinearCrossings(segmentsA, segmentsB, horizontal):
+    # Overlapping parallel segments share a run of points. Both the distance and
+    # the step sum are linear along the run, so only its ends and the point
+    # closest to the origin can be nearest, or their neighbours when one of
+    # them is the excluded starting point.
+    axis, other = (0, 1) if horizontal else (1, 0)
+    lines = defaultdict(list)
+    for segment in segmentsA:
+        lines[segment.start[other]].append(segment)
+
+    for segmentB in segmentsB:
+        line = segmentB.start[other]
+        bLow, bHigh = sorted((segmentB.start[axis], segmentB.end[axis]))
+        for segmentA in lines.get(line, []):
+            aLow, aHigh = sorted((segmentA.start[axis], segmentA.end[axis]))
+            low, high = max(aLow, bLow), min(aHigh, bHigh)
+            if low > high:
+                continue
+            nearest = min(max(0, low), high)
+            values = {low, low + 1, high - 1, high, nearest - 1, nearest, nearest + 1}
+            for value in (v for v in values if low <= v <= high):
+                point = Point(value, line) if horizontal else Point(line, value)
+                yield segmentA, segmentB, point
+
+def findCrossings(segmentsA, segmentsB):
+    horizontalsA = [s for s in segmentsA if isHorizontal(s)]
+    verticalsA = [s for s in segmentsA if not isHorizontal(s)]
+    horizontalsB = [s for s in segmentsB if isHorizontal(s)]
+    verticalsB = [s for s in segmentsB if not isHorizontal(s)]
+
+    candidates = []
+    candidates.extend(findPerpendicularCrossings(horizontalsA, verticalsB))
+    candidates.extend((a, b, p) for b, a, p in findPerpendicularCrossings(horizontalsB, verticalsA))
+    candidates.extend(findCollinearCrossings(horizontalsA, horizontalsB, True))
+    candidates.extend(findCollinearCrossings(verticalsA, verticalsB, False))
+
+    crossings = (crossing(a, b, point) for a, b, point in candidates)
+    return [c for c in crossings if c is not None]
+
+def decimate(points, resolution):
+    # Drop points closer than a pixel to the last kept one
+    width = max(p.x for p in points) - min(p.x for p in points)
+    height = max(p.y for p in points) - min(p.y for p in points)
+    pixel = max(width, height) / resolution
+
+    kept = [points[0]]
+    for point in points[1:-1]:
+        if abs(point.x - kept[-1].x) + abs(point.y - kept[-1].y) >= pixel:
+            kept.append(point)
+    kept.append(points[-1])
+    return kept
+
+def plot(segmentsA, segmentsB, resolution=2000):
+    import matplotlib.pyplot as plt
+    from matplotlib.collections import LineCollection
+
+    fig, ax = plt.subplots()
+    for segments, color in ((segmentsA, 'r'), (segmentsB, 'b')):
+        points = decimate([s.start for s in segments] + [segments[-1].end], resolution)
+        ax.add_collection(LineCollection([points], colors=color))
+    ax.autoscale()
+    ax.axis('equal')
     plt.show()
 
 def findNearestIntersection(wireA, wireB, enablePlot=False):
-    coordsA = getCoordinatesForWire(wireA)
-    coordsB = getCoordinatesForWire(wireB)
-
-    intersections = set(coordsA).intersection(coordsB)
+    segmentsA = getSegmentsForWire(wireA)
+    segmentsB = getSegmentsForWire(wireB)
+    crossings = findCrossings(segmentsA, segmentsB)
 
     if enablePlot:
-        plot(coordsA, coordsB)
+        plot(segmentsA, segmentsB)
 
-    return min(map(lambda x: abs(x[0])+abs(x[1]), intersections))
+    return min(c.distance for c in crossings)
 
 
 def part1(directions):
@@ -59,15 +152,14 @@ def part1(directions):
 
 
 def findNearestIntersection2(wireA, wireB, enablePlot=False):
-    coordsA = getCoordinatesForWire(wireA)
-    coordsB = getCoordinatesForWire(wireB)
-
-    intersections = set(coordsA).intersection(coordsB)
+    segmentsA = getSegmentsForWire(wireA)
+    segmentsB = getSegmentsForWire(wireB)
+    crossings = findCrossings(segmentsA, segmentsB)
 
     if enablePlot:
-        plot(coordsA, coordsB)
+        plot(segmentsA, segmentsB)
 
-    return min(map(lambda x: coordsA.index(x) + coordsB.index(x) + 2, intersections))
+    return min(c.steps for c in crossings)
 
 
 def part2(directions):
@@ -88,6 +180,26 @@ class TestDay03(unittest.TestCase):
     def test_findNearestIntersection_example_3(self):
         self.assertEqual(findNearestIntersection(["R98","U47","R26","D63","R33","U87","L62","D20","R33","U53","R51"], ["U98","R91","D20","R16","D67","R40","U7","R15","U6","R7"]), 135)
 
+    def test_findNearestIntersection_overlapping_wires(self):
+        self.assertEqual(findNearestIntersection(["R10","U3"], ["U1","R3","D1","R10"]), 3)
+        self.assertEqual(findNearestIntersection(["L2","R10"], ["U1","R4","D1","L1"]), 3)
+        self.assertEqual(findNearestIntersection(["R8","U5"], ["R8","D5"]), 1)
+        self.assertEqual(findNearestIntersection2(["R8","U5"], ["R8","D5"]), 2)
+
+    def test_getSegmentsForWire(self):
+        self.assertEqual(getSegmentsForWire(["R8","U5"]), [Segment(Point(0,0), Point(8,0), 0), Segment(Point(8,0), Point(8,5), 8)])
+
+    def test_findCrossings_long_segments(self):
+        crossings = findCrossings(getSegmentsForWire(["R1000000","U1000000"]), getSegmentsForWire(["U500000","R2000000"]))
+        self.assertEqual(crossings, [Crossing(Point(1000000,500000), 1500000, 3000000)])
+
+    def test_decimate(self):
+        points = [Point(i, i % 2) for i in range(10001)]
+        decimated = decimate(points, 100)
+        self.assertEqual(decimated[0], points[0])
+        self.assertEqual(decimated[-1], points[-1])
+        self.assertLess(len(decimated), 110)
+
     ## Part 2 #########################################################
 
     def test_findNearestIntersection_part2_example_1(self):
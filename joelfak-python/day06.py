@@ -2,15 +2,15 @@
 
 from helpfunctions import *
 import unittest, sys
-from collections import defaultdict, namedtuple
+from collections import defaultdict, deque
 from pprint import pprint
 
-NodesInPath = namedtuple('NodesInPath', ['nodes', 'length'])
-
 class DAG:
     def __init__(self, edges):
         self.edges = edges
         self.dag = self.createDAG(edges)
+        self.parents = {child: parent for parent in self.dag for child in self.dag[parent]}
+        self.depths = self.computeDepths("COM")
 
     def createDAG(self, edges):
         d = defaultdict(list)
@@ -30,28 +30,28 @@ class DAG:
                 s.add(node2)
         return s
 
-    def countNodesInPath(self, startnode, endnode, nodesInPath):
-        if startnode == endnode:
-            return NodesInPath(nodesInPath, 1)
-
-        childs = self.dag.get(startnode, None)
-        if childs is None:
-            return NodesInPath(nodesInPath, 0)
-
-        for child in childs:
-            res = self.countNodesInPath(child, endnode, nodesInPath)
-            if res.length > 0:
-                nodesInPath = res.nodes
-                nodesInPath.append(startnode)
-                return NodesInPath(nodesInPath, res.length + 1)
-
-        return NodesInPath(nodesInPath, 0)
+    def computeDepths(self, root):
+        depths = {root: 0}
+        queue = deque([root])
+        while queue:
+            node = queue.popleft()
+            for child in self.dag.get(node, []):
+                if child not in depths:
+                    depths[child] = depths[node] + 1
+                    queue.append(child)
+        return depths
 
     def countOrbits(self, node):
-        return self.countNodesInPath("COM", node, []).length - 1
+        return self.depths.get(node, -1)
 
     def getAllNodesOrbited(self, node):
-        return self.countNodesInPath("COM", node, []).nodes
+        if node not in self.depths:
+            return []
+        nodes = []
+        while node in self.parents:
+            node = self.parents[node]
+            nodes.append(node)
+        return nodes
 
     def countOrbitalTransfersBetween(self, currentPosition, destination):
         nodesIncurrentPositionPath = self.getAllNodesOrbited(currentPosition)
@@ -102,6 +102,10 @@ class TestDay06(unittest.TestCase):
     def test_countTotalNumberOfOrbits(self):
         self.assertEqual(countTotalNumberOfOrbits(self.graph), 42)
 
+    def test_countTotalNumberOfOrbits_long_chain(self):
+        edges = ["COM)0"] + ["{}){}".format(i, i + 1) for i in range(99999)]
+        self.assertEqual(countTotalNumberOfOrbits(DAG(edges)), 100000 * 100001 // 2)
+
 class TestDay06_part2(unittest.TestCase):
     graph = DAG(["COM)B","B)C","C)D","D)E","E)F","B)G","G)H","D)I","E)J","J)K","K)L","K)YOU","I)SAN"])
 
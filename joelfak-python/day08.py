@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 
 from helpfunctions import *
-import unittest, sys, itertools
+import unittest, sys, os, itertools, mmap
+from importlib.util import find_spec
 
 def splitNumber(numberstring):
     l = []
@@ -11,18 +12,30 @@ def splitNumber(numberstring):
 
 def decode(imagedata, width, height):
     l = splitNumber(imagedata)
+    rows = [l[i:i+width] for i in range(0, len(l), width)]
+    return [rows[i:i+height] for i in range(0, len(rows), height)]
 
-    image=[]
-    layer = 0
-    while len(l) > 0:
-        image.append([])
-        for y in range(height):
-            image[layer].append([])
-            for x in range(width):
-                image[layer][y].append(l.pop(0))
-        layer += 1
+## NumPy decoder, the cube holds the ASCII digits as uint8 ############
 
-    return image
+def imageCube(buffer, width, height):
+    import numpy as np
+    layers = len(buffer) // (width * height)
+    return np.frombuffer(buffer, dtype=np.uint8, count=layers * width * height).reshape(layers, height, width)
+
+def loadImage(filename, width, height):
+    with open(filename, 'rb') as file:
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    return imageCube(data, width, height)
+
+def errorCheckCube(cube):
+    counts = [(cube == ord(digit)).sum(axis=(1, 2)) for digit in "012"]
+    minLayer = counts[0].argmin()
+    return int(counts[1][minLayer]) * int(counts[2][minLayer])
+
+def renderCube(cube):
+    import numpy as np
+    firstVisible = (cube != ord("2")).argmax(axis=0)
+    return np.take_along_axis(cube, firstVisible[None], axis=0)[0] - ord("0")
 
 def errorCheck(image):
     minLayer = min(image, key=lambda layer: sum(1 for val in itertools.chain(*layer) if val==0))
@@ -108,6 +121,24 @@ class TestDay08_part2(unittest.TestCase):
         self.assertEqual(image, [[' ', u"\u25A0"],
                                  [u"\u25A0", ' ']])
 
+@unittest.skipIf(find_spec("numpy") is None, "needs numpy")
+class TestDay08_cube(unittest.TestCase):
+    def test_errorCheckCube(self):
+        cube = imageCube(b"111223567890", 3, 2)
+        self.assertEqual(errorCheckCube(cube), 6)
+
+    def test_renderCube(self):
+        cube = imageCube(b"0222112222120000", 2, 2)
+        self.assertEqual(renderCube(cube).tolist(), [[0,1],
+                                                     [1,0]])
+
+    def test_loadImage(self):
+        filename = os.path.join(os.path.dirname(os.path.abspath(__file__)), "inputs", "day08.txt")
+        imagedata = list(getStringsFromFile(filename))[0]
+        cube = loadImage(filename, 25, 6)
+        self.assertEqual(errorCheckCube(cube), errorCheck(decode(imagedata, 25, 6)))
+        self.assertEqual(renderCube(cube).tolist(), render(decode(imagedata, 25, 6)))
+
 ## Main ########################################################
 
 if __name__ == '__main__':
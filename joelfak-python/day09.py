@@ -3,6 +3,7 @@
 from helpfunctions import *
 import unittest, sys
 import operator, itertools, math
+from array import array
 from collections import namedtuple, deque
 
 IntcodeResult = namedtuple('IntcodeResult', ['programDone', 'output'])
@@ -24,7 +25,10 @@ def printIfVerbose(str, verbose):
 
 class IncodeComputer:
     def __init__(self, program, name="IntcodeComputer", verbose=False):
-        self.program = program.copy()
+        self.program = array('q', [0] * len(program))
+        self.overflow = {}
+        for position, value in enumerate(program):
+            self.storeValue(position, value)
         self.highestPosition = 0
         self.name = name
         self.verbose = verbose
@@ -32,7 +36,11 @@ class IncodeComputer:
         self.relativeBase = 0
 
     def getUsedProgram(self):
-        return self.program[0:self.highestPosition+1]
+        usedProgram = self.program[0:self.highestPosition+1].tolist()
+        for position, value in self.overflow.items():
+            if position <= self.highestPosition:
+                usedProgram[position] = value
+        return usedProgram
 
     def printIfVerbose(self, str):
         printIfVerbose(str, self.verbose)
@@ -42,6 +50,8 @@ class IncodeComputer:
             self.program.extend([0] * 100)
         if position > self.highestPosition:
             self.highestPosition = position
+        if self.overflow and position in self.overflow:
+            return self.overflow[position]
         return self.program[position]
 
     def writeMemory(self, position, parameter):
@@ -49,7 +59,16 @@ class IncodeComputer:
             self.program.extend([0] * 100)
         if position > self.highestPosition:
             self.highestPosition = position
-        self.program[position] = parameter
+        self.storeValue(position, parameter)
+
+    def storeValue(self, position, value):
+        try:
+            self.program[position] = value
+            if self.overflow:
+                self.overflow.pop(position, None)
+        except OverflowError: # Doesn't fit in 64 bits
+            self.program[position] = 0
+            self.overflow[position] = value
 
     def getParameter(self, pointerOffset, parameterModes):
         if len(parameterModes) > 0:
@@ -289,6 +308,12 @@ class TestDay09_part1(unittest.TestCase):
         res = ic.runUntilHalt()
         self.assertEqual(res.output[0], 1125899906842624)
 
+    def test_number_larger_than_64_bits(self):
+        ic = IncodeComputer([1102,4294967296,4294967296,7,4,7,99,0])
+        res = ic.runUntilHalt()
+        self.assertEqual(res.output[0], 18446744073709551616)
+        self.assertEqual(ic.getUsedProgram()[7], 18446744073709551616)
+
 ## Main ########################################################
 
 if __name__ == '__main__':
@@ -1,5 +1,11 @@
 #!/usr/bin/env python3
 
+import os, tempfile, unittest
+from importlib.util import find_spec
+
+__all__ = ['readFile', 'readInts', 'readIntArray', 'getIntsFromFile', 'getStringsFromFile',
+           'getCommaSeparatedIntsFromFile', 'getCommaSeparatedStringsFromFile']
+
 def readFile(filename):
     with open(filename) as file:
         while True:
@@ -8,16 +14,69 @@ def readFile(filename):
                 break
             yield data.strip()
 
+commasToSpaces = bytes.maketrans(b',', b' ')
+
+def readInts(filename):
+    # All newline or comma separated integers of the file as a list
+    with open(filename, 'rb') as file:
+        return list(map(int, file.read().translate(commasToSpaces).split()))
+
+def readIntArray(filename):
+    # All newline or comma separated integers of the file as an int64 numpy
+    # array, parsed in C by numpy. Raises OverflowError for values that need
+    # more than 64 bits, use readInts for those.
+    import numpy as np
+
+    with open(filename, 'rb') as file:
+        text = file.read().translate(commasToSpaces)
+    if not text or text.isspace():
+        return np.zeros(0, dtype=np.int64)
+    values = np.fromstring(text, dtype=np.int64, sep=' ')
+    # numpy saturates values that don't fit
+    limits = np.iinfo(np.int64)
+    if ((values == limits.max) | (values == limits.min)).any():
+        if any(not limits.min <= value <= limits.max for value in readInts(filename)):
+            raise OverflowError("{} has integers wider than 64 bits".format(filename))
+    return values
+
 def getIntsFromFile(filename):
-    return map(lambda x: int(x), readFile(filename))
+    return readInts(filename)
 
 def getStringsFromFile(filename):
     return readFile(filename)
 
 def getCommaSeparatedIntsFromFile(filename):
-    with open(filename) as file:
-        str = file.readline()
-    return list(map(int, str.split(",")))
+    return readInts(filename)
 
 def getCommaSeparatedStringsFromFile(filename):
     return list(map(lambda x: x.split(","), readFile(filename)))
+
+## Unit tests ########################################################
+
+class TestReadInts(unittest.TestCase):
+    def writeFile(self, content):
+        file = tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False)
+        file.write(content)
+        file.close()
+        self.addCleanup(os.remove, file.name)
+        return file.name
+
+    def test_multi_line_comma_file(self):
+        filename = self.writeFile("1,-2,3\n4,5\n-6\n")
+        self.assertEqual(readInts(filename), [1,-2,3,4,5,-6])
+        self.assertEqual(getCommaSeparatedIntsFromFile(filename), [1,-2,3,4,5,-6])
+
+    def test_big_integers(self):
+        self.assertEqual(readInts(self.writeFile("1,{}\n".format(1 << 70))), [1, 1 << 70])
+
+    def test_empty_file(self):
+        self.assertEqual(readInts(self.writeFile("")), [])
+
+    @unittest.skipIf(find_spec("numpy") is None, "needs numpy")
+    def test_readIntArray(self):
+        filename = self.writeFile("1,-2,30\n-4,5\n{}\n{}".format(1 << 59, (1 << 63) - 1))
+        self.assertEqual(readIntArray(filename).tolist(), [1,-2,30,-4,5,1 << 59,(1 << 63) - 1])
+        self.assertEqual(readIntArray(self.writeFile("")).tolist(), [])
+        self.assertEqual(readIntArray(self.writeFile("\n")).tolist(), [])
+        with self.assertRaises(OverflowError):
+            readIntArray(self.writeFile("1,{}".format(1 << 70)))
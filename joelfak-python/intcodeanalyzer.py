@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+
+from helpfunctions import *
+import unittest, sys, os
+from collections import namedtuple, deque
+
+Instruction = namedtuple('Instruction', ['address', 'opcode', 'modes', 'parameters'])
+BasicBlock = namedtuple('BasicBlock', ['start', 'instructions', 'successors'])
+
+INF = float('inf')
+TOP = (-INF, INF)
+WIDEN_AFTER = 3
+
+instructionSizes = {1: 4, 2: 4, 3: 2, 4: 2, 5: 3, 6: 3, 7: 4, 8: 4, 9: 2, 99: 1}
+mnemonics = {1: 'add', 2: 'mul', 3: 'in', 4: 'out', 5: 'jnz', 6: 'jz', 7: 'lt', 8: 'eq', 9: 'arb', 99: 'halt'}
+writingOpcodes = {1, 2, 3, 7, 8}
+
+def decodeInstruction(program, address):
+    if address < 0 or address >= len(program):
+        return None
+    opcode = program[address] % 100
+    if opcode not in instructionSizes:
+        return None
+    size = instructionSizes[opcode]
+    if address + size > len(program):
+        return None
+    modes = tuple((program[address] // 10 ** (2 + i)) % 10 for i in range(size - 1))
+    if any(mode > 2 for mode in modes):
+        return None
+    return Instruction(address, opcode, modes, tuple(program[address+1:address+size]))
+
+def formatParameter(mode, parameter):
+    if mode == 1: # Immediate mode
+        return str(parameter)
+    if mode == 2: # Relative mode
+        return "[rb{:+d}]".format(parameter)
+    return "[{}]".format(parameter) # Position mode
+
+def formatInstruction(instruction):
+    parameters = [formatParameter(m, p) for m, p in zip(instruction.modes, instruction.parameters)]
+    return "{:6}: {:4} {}".format(instruction.address, mnemonics[instruction.opcode], ", ".join(parameters)).rstrip()
+
+def joinIntervals(a, b):
+    return (min(a[0], b[0]), max(a[1], b[1]))
+
+def widenInterval(old, new):
+    return (old[0] if new[0] >= old[0] else -INF, old[1] if new[1] <= old[1] else INF)
+
+def overlaps(interval, start, end):
+    return interval[0] < end and interval[1] >= start
+
+class IntcodeAnalyzer:
+    # What a pass finds out about memory. Relative writes are split into pointerRanges
+    # and valueRanges by whether they push a code pointer or any other value, writes
+    # whose target is not known at all are kept apart in dynamicWrites.
+    STATE = ('writtenAddresses', 'writtenRanges', 'dynamicWrites', 'codePointers', 'pointerRanges', 'valueRanges')
+
+    def __init__(self, program):
+        self.program = list(program)
+        self.setState(tuple(set() for _ in self.STATE))
+        self.successors = {}
+        self.analyze()
+
+    def analyze(self):
+        # Each pass assumes what the previous pass found about memory, since that
+        # decides which cells are constants, and is repeated until nothing changes.
+        # Should the passes start to alternate, the states are joined from then on.
+        seen = []
+        accumulate = False
+        while True:
+            state = self.getState()
+            found = self.interpret()
+            if accumulate:
+                found = tuple(a | b for a, b in zip(found, state))
+            if found == state:
+                break
+            accumulate = accumulate or found in seen
+            seen.append(state)
+            self.setState(found)
+
+    def getState(self):
+        return tuple(set(getattr(self, name)) for name in self.STATE)
+
+    def setState(self, state):
+        for name, values in zip(self.STATE, state):
+            setattr(self, name, values)
+
+    def isConstant(self, address):
+        # Writes with unknown targets are assumed to miss, see getDynamicWrites
+        return address not in self.writtenAddresses and not any(lo <= address <= hi for lo, hi in self.writtenRanges)
+
+    def readConstant(self, mode, parameter):
+        if mode == 1:
+            return parameter
+        if mode == 0 and self.isConstant(parameter):
+            return self.program[parameter] if 0 <= parameter < len(self.program) else 0
+        return None
+
+    def isCallReturn(self, address):
+        # A pushed code pointer is a return address if it directly follows an unconditional jump
+        call = decodeInstruction(self.program, address - 3)
+        return call is not None and call.opcode in (5, 6) and call.modes[0] == 1 and \
+            (call.parameters[0] != 0) == (call.opcode == 5)
+
+    def returnTargets(self, slot):
+        # A relative jump is a return only if every write that may hit its slot
+        # pushes a code pointer. Until the first push the slot holds its initial value.
+        lo, hi = slot
+        if lo == -INF or hi == INF:
+            return None
+        if not any(overlaps(r, lo, hi + 1) for r in self.pointerRanges):
+            return None
+        if any(overlaps(r, lo, hi + 1) for r in self.valueRanges) or \
+                any(lo <= address <= hi for address in self.writtenAddresses):
+            return None
+        targets = set(self.codePointers)
+        targets.update(self.program[a] for a in range(max(lo, 0), min(hi + 1, len(self.program))))
+        if hi >= len(self.program):
+            targets.add(0)
+        return targets
+
+    def interpret(self):
+        self.found = {name: set() for name in self.STATE}
+        self.previousSuccessors = self.successors
+        self.instructions = {}
+        self.successors = {}
+        self.relativeBases = {0: (0, 0)}
+        self.unresolvedJumps = set()
+        visits = {}
+        worklist = deque([0])
+
+        while worklist:
+            address = worklist.popleft()
+            relativeBase = self.relativeBases[address]
+            instruction = decodeInstruction(self.program, address)
+            self.instructions[address] = instruction
+            if instruction is None:
+                self.successors[address] = set()
+                continue
+
+            nextStates = self.transfer(instruction, relativeBase)
+            self.successors[address] = set(nextStates)
+
+            for nextAddress, nextBase in nextStates.items():
+                if nextBase is None:
+                    nextBase = self.relativeBases.get(nextAddress)
+                    if nextBase is None:
+                        continue
+                visits[nextAddress] = visits.get(nextAddress, 0) + 1
+                old = self.relativeBases.get(nextAddress)
+                if old is None:
+                    new = nextBase
+                elif visits[nextAddress] > WIDEN_AFTER:
+                    new = widenInterval(old, joinIntervals(old, nextBase))
+                else:
+                    new = joinIntervals(old, nextBase)
+                if new != old or nextAddress not in self.instructions:
+                    self.relativeBases[nextAddress] = new
+                    worklist.append(nextAddress)
+
+        # Returns to call sites that were never reached are not part of the graph
+        for successors in self.successors.values():
+            successors &= self.instructions.keys()
+        return tuple(self.found[name] for name in self.STATE)
+
+    def transfer(self, instruction, relativeBase):
+        # Returns the successor addresses with the relative base they are entered with.
+        # Returns through pushed code pointers carry no state: the call site passes its
+        # own relative base to the return address, assuming callees restore it.
+        opcode, modes, parameters = instruction.opcode, instruction.modes, instruction.parameters
+        fallthrough = instruction.address + instructionSizes[opcode]
+        fixed = [self.isConstant(instruction.address + 1 + i) for i in range(len(parameters))]
+
+        def operand(i):
+            return self.readConstant(modes[i], parameters[i]) if fixed[i] else None
+
+        if opcode in writingOpcodes:
+            mode, parameter = modes[-1], parameters[-1]
+            pointer = False
+            if opcode in (1, 2) and modes[0] == 1 and modes[1] == 1 and fixed[0] and fixed[1]:
+                value = parameters[0] + parameters[1] if opcode == 1 else parameters[0] * parameters[1]
+                if 0 <= value < len(self.program) and self.isCallReturn(value):
+                    self.found['codePointers'].add(value)
+                    pointer = True
+            written = TOP
+            if fixed[-1] and mode == 2:
+                written = (relativeBase[0] + parameter, relativeBase[1] + parameter)
+            elif fixed[-1]:
+                written = (parameter, parameter)
+            if -INF in written or INF in written:
+                self.found['dynamicWrites'].add(instruction.address)
+            elif mode == 2:
+                self.found['writtenRanges'].add(written)
+                self.found['pointerRanges' if pointer else 'valueRanges'].add(written)
+            else:
+                self.found['writtenAddresses'].add(parameter)
+            return {fallthrough: relativeBase}
+
+        if opcode == 9:
+            offset = operand(0)
+            if offset is None:
+                return {fallthrough: TOP}
+            return {fallthrough: (relativeBase[0] + offset, relativeBase[1] + offset)}
+
+        if opcode in (5, 6):
+            condition = operand(0)
+            target = operand(1)
+            if target is not None:
+                targets = {target: relativeBase}
+            else:
+                returns = None
+                if modes[1] == 2 and fixed[1]:
+                    returns = self.returnTargets((relativeBase[0] + parameters[1], relativeBase[1] + parameters[1]))
+                if returns is None:
+                    # The real targets may be anywhere, keep the ones an earlier pass found
+                    self.unresolvedJumps.add(instruction.address)
+                    returns = self.previousSuccessors.get(instruction.address, set()) - {fallthrough}
+                targets = {pointer: None for pointer in returns}
+            if condition is None:
+                return {**targets, fallthrough: relativeBase}
+            if (condition != 0) != (opcode == 5):
+                return {fallthrough: relativeBase}
+            if fallthrough in self.codePointers:
+                return {**targets, fallthrough: relativeBase}
+            return targets
+
+        if opcode == 99:
+            return {}
+
+        return {fallthrough: relativeBase}
+
+    def getReachableInstructions(self):
+        return sorted((i for i in self.instructions.values() if i is not None), key=lambda i: i.address)
+
+    def getDisassembly(self):
+        lines = []
+        for address, instruction in sorted(self.instructions.items()):
+            if instruction is None:
+                word = self.program[address] if 0 <= address < len(self.program) else 0
+                lines.append("{:6}: ???  {}".format(address, word))
+            else:
+                lines.append(formatInstruction(instruction))
+        return lines
+
+    def getWrittenAddresses(self):
+        merged = []
+        for lo, hi in sorted(self.writtenRanges):
+            if merged and lo <= merged[-1][1] + 1:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], hi))
+            else:
+                merged.append((lo, hi))
+        return sorted(self.writtenAddresses), merged
+
+    def getDynamicWrites(self):
+        return sorted(self.dynamicWrites)
+
+    def isModifiable(self, address):
+        if self.dynamicWrites:
+            return True
+        instruction = self.instructions[address]
+        start = address
+        end = start + (instructionSizes[instruction.opcode] if instruction else 1)
+        if any(start <= address < end for address in self.writtenAddresses):
+            return True
+        return any(overlaps(interval, start, end) for interval in self.writtenRanges)
+
+    def getNeverModifiedInstructions(self):
+        return [i.address for i in self.getReachableInstructions() if not self.isModifiable(i.address)]
+
+    def getUnresolvedJumps(self):
+        return sorted(self.unresolvedJumps)
+
+    def isComplete(self):
+        # With unresolved jumps some reachable code may be missing from the results
+        return not self.unresolvedJumps
+
+    def isNeverSelfModified(self):
+        # Only provable when every jump target outside of returns is known
+        if self.unresolvedJumps or self.dynamicWrites:
+            return False
+        return not any(self.isModifiable(address) for address in self.instructions)
+
+    def getBasicBlocks(self):
+        leaders = {0}
+        for address, successors in self.successors.items():
+            instruction = self.instructions[address]
+            if instruction is None or len(successors) != 1 or instruction.opcode in (5, 6):
+                leaders |= successors
+            elif successors != {address + instructionSizes[instruction.opcode]}:
+                leaders |= successors
+
+        predecessors = {}
+        for address, successors in self.successors.items():
+            for successor in successors:
+                predecessors.setdefault(successor, set()).add(address)
+        leaders |= {address for address, p in predecessors.items() if len(p) > 1}
+
+        blocks = {}
+        for leader in sorted(leaders):
+            instructions = []
+            address = leader
+            while address in self.instructions and self.instructions[address] is not None:
+                instruction = self.instructions[address]
+                instructions.append(instruction)
+                successors = self.successors[address]
+                fallthrough = address + instructionSizes[instruction.opcode]
+                if successors != {fallthrough} or fallthrough in leaders:
+                    break
+                address = fallthrough
+            blocks[leader] = BasicBlock(leader, instructions, sorted(self.successors.get(address, set())))
+        return blocks
+
+    def getLoops(self):
+        return [(start, successor) for start, block in sorted(self.getBasicBlocks().items())
+                for successor in block.successors if successor <= start]
+
+## Unit tests ########################################################
+
+class TestIntcodeAnalyzer(unittest.TestCase):
+    def test_disassembly(self):
+        analyzer = IntcodeAnalyzer([1002,4,3,4,33])
+        self.assertEqual(analyzer.getDisassembly(), ["     0: mul  [4], 3, [4]", "     4: ???  33"])
+
+    def test_disassembly_relative_mode(self):
+        analyzer = IntcodeAnalyzer([109,19,204,-34,99])
+        self.assertEqual(analyzer.getDisassembly(), ["     0: arb  19", "     2: out  [rb-34]", "     4: halt"])
+
+    def test_written_addresses(self):
+        analyzer = IntcodeAnalyzer([109,10,1101,1,2,20,21101,3,4,1,99])
+        self.assertEqual(analyzer.getWrittenAddresses(), ([20], [(11, 11)]))
+
+    def test_self_modifying_program(self):
+        analyzer = IntcodeAnalyzer([1002,4,3,4,33])
+        self.assertFalse(analyzer.isNeverSelfModified())
+
+    def test_program_writing_only_data(self):
+        analyzer = IntcodeAnalyzer([3,9,8,9,10,9,4,9,99,-1,8])
+        self.assertTrue(analyzer.isNeverSelfModified())
+        self.assertEqual(analyzer.getNeverModifiedInstructions(), [0, 2, 6, 8])
+
+    def test_constant_condition_prunes_branch(self):
+        analyzer = IntcodeAnalyzer([1105,1,4,99,104,7,99])
+        self.assertEqual([i.address for i in analyzer.getReachableInstructions()], [0, 4, 6])
+
+    def test_basic_blocks_and_loops(self):
+        # Count down [13] from 3 to 0
+        analyzer = IntcodeAnalyzer([1001,13,-1,13,1005,13,0,99,0,0,0,0,0,3])
+        blocks = analyzer.getBasicBlocks()
+        self.assertEqual(sorted(blocks), [0, 7])
+        self.assertEqual(blocks[0].successors, [0, 7])
+        self.assertEqual(analyzer.getLoops(), [(0, 0)])
+
+    def test_return_through_pushed_address(self):
+        # Call a subroutine at 10 that returns through the address pushed on the stack
+        analyzer = IntcodeAnalyzer([109,20,21101,9,0,0,1105,1,10,99,104,1,2106,0,0])
+        self.assertIn(9, [i.address for i in analyzer.getReachableInstructions()])
+        self.assertTrue(analyzer.isNeverSelfModified())
+
+    def test_jump_through_written_operand_is_unresolved(self):
+        # The jump target operand at address 8 is overwritten by the input
+        analyzer = IntcodeAnalyzer([3,8,1001,8,10,8,105,1,0,99,99])
+        self.assertEqual(analyzer.getUnresolvedJumps(), [6])
+        self.assertFalse(analyzer.isNeverSelfModified())
+
+    def test_relative_jump_through_input_is_unresolved(self):
+        # Jumps to an input stored at [rb], which is not a pushed return address
+        analyzer = IntcodeAnalyzer([109,100,203,0,2106,0,0,99,1101,0,0,0,99])
+        self.assertEqual(analyzer.getUnresolvedJumps(), [4])
+        self.assertFalse(analyzer.isComplete())
+        self.assertFalse(analyzer.isNeverSelfModified())
+
+    def test_return_slot_also_holding_data_is_unresolved(self):
+        # The return slot [rb] is also written with plain data before returning
+        analyzer = IntcodeAnalyzer([109,20,21101,9,0,0,1105,1,10,99,21101,5,0,0,2106,0,0])
+        self.assertEqual(analyzer.getUnresolvedJumps(), [14])
+
+    def test_day9_program(self):
+        # Builds its relative base from written memory, so only its returns are unresolved
+        analyzer = IntcodeAnalyzer(getCommaSeparatedIntsFromFile(os.path.join(os.path.dirname(__file__), "inputs", "day09.txt")))
+        reachable = analyzer.getReachableInstructions()
+        self.assertEqual(analyzer.successors[8], {11, 53})
+        self.assertIn(970, [i.address for i in reachable])
+        self.assertEqual(analyzer.getUnresolvedJumps(), [463, 481, 643, 687, 970])
+        self.assertTrue(all(block.instructions for block in analyzer.getBasicBlocks().values()))
+        writers = {i.parameters[-1] for i in reachable if i.opcode in writingOpcodes and i.modes[-1] == 0
+                   and i.address not in analyzer.dynamicWrites}
+        self.assertEqual(analyzer.getWrittenAddresses()[0], sorted(writers))
+        self.assertIn(25, analyzer.getDynamicWrites())
+        self.assertFalse(analyzer.isNeverSelfModified())
+
+## Main ########################################################
+
+if __name__ == '__main__':
+
+    analyzer = IntcodeAnalyzer(getCommaSeparatedIntsFromFile(sys.argv[1]))
+    if not analyzer.isComplete():
+        print("Warning: jumps at {} could not be resolved, the reachable code below is incomplete\n"
+              .format(analyzer.getUnresolvedJumps()))
+    print("\n".join(analyzer.getDisassembly()))
+    print("\nBasic blocks:")
+    for start, block in sorted(analyzer.getBasicBlocks().items()):
+        print("{:6}: {} instructions -> {}".format(start, len(block.instructions), block.successors))
+    addresses, ranges = analyzer.getWrittenAddresses()
+    print("\nWritten addresses: {}".format(addresses))
+    print("Written relative ranges: {}".format(ranges))
+    print("Writes to unknown addresses: {}".format(analyzer.getDynamicWrites()))
+    print("Loops: {}".format(analyzer.getLoops()))
+    print("Unresolved jumps: {}".format(analyzer.getUnresolvedJumps()))
+    print("Never self-modified: {}".format(analyzer.isNeverSelfModified()))
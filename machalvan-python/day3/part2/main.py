@@ -1,56 +1,111 @@
 from utils import read_input, write_output, check_result
+from collections import defaultdict
 import re
 
 
-def calc(lines):
-    result = 99999999
-    parser = re.compile("-?[RLUD]+\d+")
-    values = [parser.findall(line.strip()) for line in lines]
+def to_segments(wire):
+    x = 0
+    y = 0
+    steps = 0
+    segments = []
+
+    for vector in wire:
+        dir = vector[0]
+        len = int(vector[1:])
+        start_x, start_y = x, y
+
+        if dir == 'R':
+            x += len
+        elif dir == 'L':
+            x -= len
+        elif dir == 'U':
+            y += len
+        elif dir == 'D':
+            y -= len
+
+        segments.append((start_x, start_y, x, y, steps))
+        steps += len
+
+    return segments
+
+
+def shared_box(a, b):
+    low_x = max(min(a[0], a[2]), min(b[0], b[2]))
+    high_x = min(max(a[0], a[2]), max(b[0], b[2]))
+    low_y = max(min(a[1], a[3]), min(b[1], b[3]))
+    high_y = min(max(a[1], a[3]), max(b[1], b[3]))
+
+    if low_x > high_x or low_y > high_y:
+        return None
+
+    return low_x, high_x, low_y, high_y
+
+
+def steps_to(segment, point):
+    return segment[4] + abs(point[0] - segment[0]) + abs(point[1] - segment[1])
 
-    wire_paths = []
 
-    for wire in values:
-        x = 0
-        y = 0
-        wire_path = []
+def crossings(values):
+    found = []
+    wires = [to_segments(wire) for wire in values]
 
-        for vector in wire:
-            dir = vector[0]
-            len = int(vector[1:])
+    # Bucket the segments in a coarse grid and only compare within buckets
+    segment_count = sum(map(len, wires))
+    total_length = sum(abs(s[2] - s[0]) + abs(s[3] - s[1]) for wire in wires for s in wire)
+    size = max(1, total_length // max(1, segment_count))
+    grid = defaultdict(list)
 
-            if dir == 'R':
-                for step in range(len):
-                    x += 1
-                    wire_path.append((x, y))
+    for i, wire in enumerate(wires):
+        for segment in wire:
+            for gx in range(min(segment[0], segment[2]) // size, max(segment[0], segment[2]) // size + 1):
+                for gy in range(min(segment[1], segment[3]) // size, max(segment[1], segment[3]) // size + 1):
+                    grid[(gx, gy)].append((i, segment))
 
-            elif dir == 'L':
-                for step in range(len):
-                    x -= 1
-                    wire_path.append((x, y))
+    for cell, bucket in grid.items():
+        for n, (i, a) in enumerate(bucket):
+            for j, b in bucket[n + 1:]:
+                if i == j:
+                    continue
 
-            elif dir == 'U':
-                for step in range(len):
-                    y += 1
-                    wire_path.append((x, y))
+                box = shared_box(a, b)
 
-            elif dir == 'D':
-                for step in range(len):
-                    y -= 1
-                    wire_path.append((x, y))
+                if box is None:
+                    continue
 
-        wire_paths.append(wire_path)
+                low_x, high_x, low_y, high_y = box
+                xs = range(max(low_x, cell[0] * size), min(high_x, cell[0] * size + size - 1) + 1)
+                ys = range(max(low_y, cell[1] * size), min(high_y, cell[1] * size + size - 1) + 1)
 
-    intersections = list(set(wire_paths[0]).intersection(wire_paths[1]))
+                for x in xs:
+                    for y in ys:
+                        steps_a = steps_to(a, (x, y))
+                        steps_b = steps_to(b, (x, y))
 
-    for intersection in intersections:
-        dis = 0
-        for wire_path in wire_paths:
-            for coordinate in wire_path:
-                dis += 1
-                if coordinate == intersection:
-                    break
+                        if steps_a > a[4] and steps_b > b[4]:
+                            found.append((min(i, j), max(i, j), (x, y), steps_a + steps_b))
+
+    return found
+
+
+def parse(lines):
+    parser = re.compile("-?[RLUD]+\d+")
+    return [parser.findall(line.strip()) for line in lines if line.strip()]
+
+
+def calc_many(lines):
+    result = {}
+
+    for i, j, point, steps in crossings(parse(lines)):
+        result[(i, j)] = min(result.get((i, j), steps), steps)
+
+    return result
+
+
+def calc(lines):
+    result = 99999999
 
-        result = min(result, dis)
+    for i, j, point, steps in crossings(parse(lines)[:2]):
+        result = min(result, steps)
 
     return result
 